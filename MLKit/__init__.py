@@ -1,9 +1,28 @@
-__all__ = ["column", "column_attributes", "command_line", "data_table", "display", "file_manager", "logistic_regression"]
+__all__ = ["batch_prediction", "column", "column_attributes", "command_line", "cross_validation", "data_table", "display", "file_manager", "group_by", "imputer", "logistic_regression", "model", "profiler", "scaler", "statistics"]
 from .display import *
 from .file_manager import *
 from .command_line import CommandLine
 from .logistic_regression import LogisticRegression
+from .model import Model
 from .display import Color, Style
 from .data_table import DataTable
 from .column import Column
 from .column_attributes import ColumnAttributes
+from .group_by import GroupBy
+from .profiler import Profiler
+from .scaler import StandardScaler
+from .imputer import Imputer
+from .batch_prediction import BatchPredictor
+import importlib
+
+# Modules importing heavy packages are only imported the first time they are used.
+_lazy_modules = ["server"]
+_lazy_names = {"PredictionServer": "server"}
+
+
+def __getattr__(name):
+    if name in _lazy_modules:
+        return importlib.import_module("." + name, __name__)
+    if name in _lazy_names:
+        return getattr(importlib.import_module("." + _lazy_names[name], __name__), name)
+    raise AttributeError("module " + __name__ + " has no attribute " + name)
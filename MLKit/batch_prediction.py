@@ -0,0 +1,167 @@
+from . import data_table
+from . import file_manager
+from . import model
+from . import display
+from . import profiler
+import concurrent.futures
+import itertools
+import numpy as np
+import glob
+import os
+
+
+# The model of the process, loaded once by each worker process.
+_model = None
+
+
+def _load_model(model_file_name):
+    global _model
+    _model = model.Model.load(model_file_name)
+
+
+def _predict_file(file_name, chunk_size, with_probabilities=False):
+    """Return the index in the model row names of the predicted value of each row of a csv file, read by chunks, or the
+    rows x classes probabilities of the row names if with_probabilities is True."""
+    results = []
+
+    for table in data_table.DataTable.read_chunks(file_name, chunk_size, columns=_model.feature_names):
+        feature_columns = [table.column_named(name) for name in _model.feature_names]
+        for (name, feature_column) in zip(_model.feature_names, feature_columns):
+            if feature_column is None:
+                display.error("Column " + name + " doesn't exists in " + file_name + ".")
+
+        X = _model.scaler.transform([feature_column.numeric_data() for feature_column in feature_columns], copy=False)
+        results.append(_model.predict_probabilities(X.T) if with_probabilities else _model.predict_indexes(X.T))
+
+    if with_probabilities:
+        return np.concatenate(results) if len(results) > 0 else np.empty((0, len(_model.row_names)))
+
+    # The smallest integer type holding every class keeps the results sent back by the workers small.
+    index_type = np.min_scalar_type(max(len(_model.row_names) - 1, 0))
+    if len(results) == 0:
+        return np.empty(0, dtype=index_type)
+    return np.concatenate(results).astype(index_type)
+
+
+class BatchPredictor:
+
+    """
+    Predicts many csv files across a pool of processes, each one loading the model once. The predictions of each file
+    are written as soon as the files before it are written, so the output keeps the order of the files.
+
+    Attributes:
+        model_file_name     The .mlmodel file name of the model.
+        target_column_name  The name of the predicted column in the output files.
+        workers             The number of processes predicting the files. Every core is used if None.
+        chunk_size          The number of rows read and scored at once.
+        all_probabilities   Write the probability of each row name after the predicted value.
+        top_k               Write the top_k most probable row names of each row with their probability, if not None.
+    """
+
+    def __init__(self, model_file_name, target_column_name="Hogwarts House", workers=None,
+                 chunk_size=file_manager.DEFAULT_CHUNK_SIZE, all_probabilities=False, top_k=None):
+        self.model_file_name = model_file_name
+        self.target_column_name = target_column_name
+        self.workers = os.cpu_count() if workers is None else workers
+        self.chunk_size = chunk_size
+        self.all_probabilities = all_probabilities
+        self.top_k = top_k
+
+    @property
+    def with_probabilities(self):
+        return self.all_probabilities or self.top_k is not None
+
+    @staticmethod
+    def file_names_of(patterns):
+        """Return the csv files matching file names or glob patterns, in the order of the patterns, each pattern's files
+        being sorted."""
+        file_names = []
+
+        for pattern in patterns:
+            matching_file_names = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+            if len(matching_file_names) == 0:
+                display.error("No such file matching " + pattern)
+            file_names += [file_name for file_name in matching_file_names if file_name not in file_names]
+
+        return file_names
+
+    def predictions(self, file_names):
+        """Yield each file name with the predicted row names of its rows and their probability columns, in the order of
+        the files."""
+        trained_model = model.Model.load(self.model_file_name)
+
+        if self.workers <= 1 or len(file_names) <= 1:
+            _load_model(self.model_file_name)
+            for file_name in file_names:
+                yield (file_name,) + self.__predicted_values(trained_model, _predict_file(file_name, self.chunk_size,
+                                                                                          self.with_probabilities))
+            return
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=min(self.workers, len(file_names)),
+                                                    initializer=_load_model,
+                                                    initargs=(self.model_file_name,)) as executor:
+            results = executor.map(_predict_file, file_names, itertools.repeat(self.chunk_size),
+                                   itertools.repeat(self.with_probabilities))
+            for (file_name, result) in zip(file_names, results):
+                yield (file_name,) + self.__predicted_values(trained_model, result)
+
+    def __predicted_values(self, trained_model, result):
+        row_names = np.array(trained_model.row_names, dtype=object)
+        if not self.with_probabilities:
+            return row_names[result], {}
+        return row_names[np.argmax(result, axis=1)], trained_model.probability_columns(result, self.all_probabilities,
+                                                                                       self.top_k)
+
+    def __column_names(self):
+        trained_model = model.Model.load(self.model_file_name)
+        return [self.target_column_name] + list(trained_model.probability_columns(
+            np.empty((0, len(trained_model.row_names))), self.all_probabilities, self.top_k).keys())
+
+    @profiler.Profiler.profiled("BatchPredictor.predict")
+    def predict(self, file_names, output_directory="predictions"):
+        """Predict each csv file into a csv file of the same name in output_directory."""
+        output_file_names = [os.path.join(output_directory, os.path.basename(file_name)) for file_name in file_names]
+        BatchPredictor.__check_output_file_names(file_names, output_file_names)
+        os.makedirs(output_directory, exist_ok=True)
+
+        for ((file_name, predicted_values, probability_columns), output_file_name) in \
+                zip(self.predictions(file_names), output_file_names):
+            with file_manager.CsvWriter(output_file_name, ["Index"] + self.__column_names(),
+                                        decimals=6 if self.with_probabilities else None) as writer:
+                self.__write(writer, [], predicted_values, probability_columns)
+            display.success("Saved csv file in " + output_file_name)
+
+    @profiler.Profiler.profiled("BatchPredictor.predict")
+    def predict_merged(self, file_names, output_file_name="houses.csv"):
+        """Predict every csv file into a single csv file, with the file name of each row."""
+        BatchPredictor.__check_output_file_names(file_names, [output_file_name])
+        with file_manager.CsvWriter(output_file_name, ["File", "Index"] + self.__column_names(),
+                                    decimals=6 if self.with_probabilities else None) as writer:
+            for (file_name, predicted_values, probability_columns) in self.predictions(file_names):
+                self.__write(writer, [file_name], predicted_values, probability_columns)
+
+        display.success("Saved csv file in " + output_file_name)
+
+    @staticmethod
+    def __check_output_file_names(file_names, output_file_names):
+        """Stop before scoring if two files would be predicted into the same csv file, or if a predicted file would
+        replace a file to predict."""
+        input_paths = {os.path.realpath(file_name) for file_name in file_names}
+        output_paths = {}
+
+        for (file_name, output_file_name) in zip(file_names, output_file_names):
+            output_path = os.path.realpath(output_file_name)
+            if output_path in input_paths:
+                display.error("The predictions of " + file_name + " would replace the file to predict " +
+                              output_file_name + ".")
+            if output_path in output_paths:
+                display.error(file_name + " and " + output_paths[output_path] + " would both be predicted into " +
+                              output_file_name + ".")
+            output_paths[output_path] = file_name
+
+    def __write(self, writer, constant_values, predicted_values, probability_columns):
+        for start in range(0, predicted_values.shape[0], self.chunk_size):
+            values = predicted_values[start:start + self.chunk_size]
+            writer.write_columns([[value] * values.shape[0] for value in constant_values] +
+                                 [np.arange(start, start + values.shape[0]), values] +
+                                 [column[start:start + self.chunk_size] for column in probability_columns.values()])
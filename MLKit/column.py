@@ -1,4 +1,15 @@
 from . import column_attributes
+import numpy as np
+
+
+def _is_number(value):
+    if value == "Nan":
+        return False
+    try:
+        float(value)
+        return True
+    except ValueError:
+        return False
 
 
 class Column:
@@ -6,29 +17,211 @@ class Column:
     """
     A DataTable Column.
 
+    Numeric columns are stored as a float64 array with a validity mask, string columns as integer codes in a
+    dictionary of their distinct values.
+
     Attributes:
         name        The name of the column.
-        values      The values of the column.
+        type        The ColumnAttributes.Type of the column. None if the column only contains missing values.
+        is_mixed    True if the column contains different value types.
+        data        The float64 values of a numeric column.
+        codes       The int32 codes of a string column, -1 for missing values.
+        categories  The distinct values of a string column, in order of appearance.
+        category_codes  The code of each distinct value of a string column. The chunks of a file read by
+                    DataTable.read_chunks share the same dictionary.
+        mask        True where the value is not missing.
         attributes  The attributes of the column. Computed by calling the compute_attributes method.
     """
 
-    def __init__(self, name, values):
+    def __init__(self, name, values=None):
         self.name = name
-        self.values = values
-        self.scaled_values = []
+        self.type = None
+        self.is_mixed = False
+        self.data = np.empty(0, dtype=np.float64)
+        self.codes = None
+        self.categories = []
+        self.category_codes = {}
+        self.mask = np.empty(0, dtype=bool)
+        self.scaled_values = None
         self.attributes = None
-    
-    def compute_attributes(self, model):
-        """Compute the column attributes"""
-        self.attributes = column_attributes.ColumnAttributes(self)
-        if model and self.name in list(model["attributes"]["mean"].keys()):
+
+        if values is not None:
+            builder = ColumnBuilder(name)
+            builder.append(values)
+            builder.build(column=self)
+
+    def __len__(self):
+        return self.mask.shape[0]
+
+    @property
+    def values(self):
+        """The values of the column as a list, None for missing values."""
+        if self.codes is None:
+            return np.where(self.mask, self.data, None).tolist()
+        return self.labels().tolist()
+
+    def is_numeric(self):
+        return self.codes is None
+
+    def labels(self):
+        """Return the values of the column as an object array, None for missing values."""
+        if self.codes is None:
+            return np.where(self.mask, self.data, None)
+        categories = np.array(self.categories + [None], dtype=object)
+        return categories[self.codes]
+
+    def encoded(self):
+        """Return the distinct values of the column as strings, and the int32 code of each row in these values, -1 for
+        missing values. String columns return their dictionary, numeric columns their sorted distinct values."""
+        if self.codes is not None:
+            return self.categories, self.codes
+
+        codes = np.full(self.mask.shape[0], -1, dtype=np.int32)
+        (unique_values, inverse) = np.unique(self.data[self.mask], return_inverse=True)
+        codes[self.mask] = inverse.reshape(-1)
+        return [str(value) for value in unique_values.tolist()], codes
+
+    def numeric_data(self, rows=None):
+        """Return the values of the column, or of some rows of the column, as a float64 array. String values are
+        replaced by their code and missing values by nan."""
+        mask = self.mask if rows is None else self.mask[rows]
+        if self.codes is None:
+            return np.where(mask, self.data if rows is None else self.data[rows], np.nan)
+        return np.where(mask, self.codes if rows is None else self.codes[rows], np.nan)
+
+    def to_cache(self):
+        """Return the metadata and the arrays to cache the column."""
+        metadata = {
+            "name": self.name,
+            "type": None if self.type is None else self.type.name,
+            "is_mixed": self.is_mixed,
+            "categories": self.categories
+        }
+        arrays = {"mask": self.mask}
+        if self.codes is None:
+            arrays["data"] = self.data
+        else:
+            arrays["codes"] = self.codes
+
+        return metadata, arrays
+
+    @staticmethod
+    def from_cache(metadata, arrays):
+        """Return a column from the metadata and the memory-mapped arrays returned by to_cache."""
+        cached_column = Column(metadata["name"])
+        cached_column.type = None if metadata["type"] is None else column_attributes.ColumnAttributes.Type[metadata["type"]]
+        cached_column.is_mixed = metadata["is_mixed"]
+        cached_column.categories = metadata["categories"]
+        cached_column.category_codes = {value: code for (code, value) in enumerate(cached_column.categories)}
+        cached_column.mask = arrays["mask"]
+        cached_column.data = arrays.get("data")
+        cached_column.codes = arrays.get("codes")
+
+        return cached_column
+
+    def compute_attributes(self, model, attributes=None):
+        """Compute the column attributes, unless they are already computed by another process."""
+        self.attributes = column_attributes.ColumnAttributes(self) if attributes is None else attributes
+        if model and model.has_feature(self.name):
             self.__scale_values(model)
 
     def __scale_values(self, model):
-        for value in self.values:
-            if value is None:
-                self.scaled_values.append(None)
-                continue
-            numeric_value = self.attributes.numeric_value_for_value(value)
-            scaled_value = (numeric_value - model["attributes"]["mean"][self.name]) / model["attributes"]["std"][self.name]
-            self.scaled_values.append(scaled_value)
+        self.scaled_values = model.scaler.transform_values(self.name, self.numeric_data())
+
+
+class ColumnBuilder:
+
+    """
+    Parses the raw csv cells of a column, chunk by chunk, into the typed buffers of a Column. The dictionary of the
+    string values is kept between builds, so that successive chunks of a file share the same codes.
+
+    Attributes:
+        name        The name of the column.
+        categories  The dictionary of the string values met so far, with their code.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.categories = {}
+        self.__chunks = []
+        self.__has_numeric = False
+        self.__has_string = False
+        self.__is_mixed = False
+
+    def append(self, cells):
+        """Parse a chunk of raw cells. Empty strings and None are missing values."""
+        if isinstance(cells, np.ndarray) and cells.dtype.kind == "U":
+            raw = cells
+        else:
+            raw = np.array(["" if cell is None else cell for cell in cells], dtype=str)
+        mask = raw != ""
+        present = raw[mask]
+
+        if present.shape[0] == 0:
+            self.__chunks.append(("missing", mask, None, None))
+            return
+
+        try:
+            data = np.zeros(raw.shape[0], dtype=np.float64)
+            data[mask] = present.astype(np.float64)
+            self.__has_numeric = True
+            # The raw cells are kept until the build, in case a later chunk makes the column a mixed one.
+            self.__chunks.append(("numeric", mask, data, present))
+            return
+        except ValueError:
+            pass
+
+        (uniques, first_indexes, inverse) = np.unique(present, return_index=True, return_inverse=True)
+        if any(_is_number(value) for value in uniques.tolist()):
+            self.__is_mixed = True
+        self.__has_string = True
+        self.__chunks.append(("string", mask, self.__encode(uniques, first_indexes, inverse, mask), None))
+
+    def __encode(self, uniques, first_indexes, inverse, mask):
+        unique_codes = np.empty(uniques.shape[0], dtype=np.int32)
+
+        for unique_index in np.argsort(first_indexes, kind="stable"):
+            value = str(uniques[unique_index])
+            unique_codes[unique_index] = self.categories.setdefault(value, len(self.categories))
+
+        codes = np.full(mask.shape[0], -1, dtype=np.int32)
+        codes[mask] = unique_codes[inverse.reshape(-1)]
+        return codes
+
+    def build(self, column=None):
+        """Return the Column holding every chunk parsed since the previous build."""
+        if column is None:
+            column = Column(self.name)
+
+        masks = [mask for (_, mask, _, _) in self.__chunks]
+        column.mask = np.concatenate(masks) if len(masks) > 0 else np.empty(0, dtype=bool)
+        column.is_mixed = self.__is_mixed or (self.__has_numeric and self.__has_string)
+
+        if self.__has_string:
+            column.type = column_attributes.ColumnAttributes.Type.string
+            column.codes = np.concatenate([self.__codes_of_chunk(chunk) for chunk in self.__chunks])
+            column.categories = list(self.categories.keys())
+            column.category_codes = self.categories
+            column.data = None
+        else:
+            if self.__has_numeric:
+                column.type = column_attributes.ColumnAttributes.Type.numeric
+            column.data = np.concatenate([np.zeros(mask.shape[0]) if data is None else data
+                                          for (_, mask, data, _) in self.__chunks]) if len(masks) > 0 else column.data
+
+        self.__chunks = []
+        self.__has_numeric = False
+        self.__has_string = False
+        self.__is_mixed = False
+        return column
+
+    def __codes_of_chunk(self, chunk):
+        kind, mask, data, present = chunk
+
+        if kind == "string":
+            return data
+        elif kind == "missing":
+            return np.full(mask.shape[0], -1, dtype=np.int32)
+
+        # A numeric chunk in a mixed column: its values keep the text of the file.
+        return self.__encode(*np.unique(present, return_index=True, return_inverse=True), mask)
@@ -1,6 +1,7 @@
 from . import display
+from . import statistics
+from . import profiler
 from enum import Enum
-import math
 
 
 class ColumnAttributes:
@@ -28,7 +29,8 @@ class ColumnAttributes:
                 return "Numeric"
             return None
 
-    def __init__(self, column):
+    def __init__(self, column=None, statistics=None):
+        """Compute the attributes of a column, or read them from the ColumnStatistics merged from its chunks."""
         self.count = 0
         self.mean = None
         self.minimum = float("inf")
@@ -39,91 +41,104 @@ class ColumnAttributes:
         self.std = None
         self.type = None
         self.numeric_values = {}
-        self.__compute_attributes(column)
-    
+
+        if column is not None:
+            with profiler.Profiler.stage("ColumnAttributes", rows=len(column)):
+                self.__compute_attributes(column)
+        elif statistics is not None:
+            self.__read_statistics(statistics)
+
     def __compute_attributes(self, column):
-        values_sum = 0
-
-        for value in column.values:
-            if value is None:
-                continue
-
-            if not self.__is_type_correct_for_value(value):
-                display.warning("Column " + column.name + " contains different value types.")
-                self.minimum = None
-                self.maximum = None
-                return
-            
-            self.__transform_value_to_numeric_if_needed(value)
-
-            float_value = self.numeric_value_for_value(value)
-            values_sum += float_value
-            self.count += 1
-
-            if float_value < self.minimum:
-                self.minimum = float_value
-            if float_value > self.maximum:
-                self.maximum = float_value
-        
-        if self.count == 0:
+        if not self.__set_type(column.name, column.type, column.is_mixed, column.category_codes):
             return
 
-        self.mean = values_sum / self.count
-        self.percent_25 = 0
-        self.percent_50 = 0
-        self.percent_75 = 0
-        squared_sum = 0
-
-        replaced_values = []
-        for value in column.values:
-            if value is None:
-                continue
-            replaced_values.append(self.numeric_value_for_value(value))
-        sorted_values = sorted(replaced_values)
-
-        for (index, value) in enumerate(sorted_values):
-            if value is None:
-                continue
-
-            squared_sum += (self.mean - value) ** 2
-            
-            if index == round(self.count / 4):
-                self.percent_25 = value
-            if index == round(self.count / 2):
-                self.percent_50 = value
-            if index == round(3 * self.count / 4):
-                self.percent_75 = value
-
-        variance = squared_sum / self.count
-        self.std = math.sqrt(variance)
-    
-    def __is_type_correct_for_value(self, value):
-        if value is None:
-            return True
-        
-        if self.type == ColumnAttributes.Type.string and value == "Nan":
-            return True
-        elif self.type is None:
-            self.type = ColumnAttributes.Type.type_of_value(value)
-            return True
-        elif self.type == ColumnAttributes.Type.type_of_value(value):
-            return True
-        else:
+        values = column.numeric_data()[column.mask]
+        running = statistics.RunningStatistics()
+        running.update(values)
+        percents = statistics.values_at_ranks(values, statistics.quartile_ranks(running.count))
+        self.__set_statistics(running, percents)
+
+    def __read_statistics(self, column_statistics):
+        if not self.__set_type(column_statistics.name, column_statistics.type, column_statistics.is_mixed,
+                               column_statistics.category_codes):
+            return
+
+        running = column_statistics.running
+        ranks = statistics.quartile_ranks(running.count)
+        percents = [column_statistics.sketch.value_at_rank(rank) for rank in ranks]
+        self.__set_statistics(running, percents)
+
+    def __set_type(self, name, column_type, is_mixed, category_codes):
+        self.type = column_type
+
+        if is_mixed:
+            display.warning("Column " + name + " contains different value types.")
+            self.minimum = None
+            self.maximum = None
             return False
-        
-    def __transform_value_to_numeric_if_needed(self, value):
-        if value is None or self.type == ColumnAttributes.Type.numeric:
+
+        if self.type == ColumnAttributes.Type.string:
+            self.numeric_values = category_codes
+        return True
+
+    def __set_statistics(self, running, percents):
+        self.count = running.count
+
+        if self.count == 0:
             return
-        
-        if self.numeric_values.get(value) is None:
-            self.numeric_values[value] = len(self.numeric_values.keys())
-    
+
+        self.minimum = self.__typed_value(running.minimum)
+        self.maximum = self.__typed_value(running.maximum)
+        self.mean = running.mean
+        self.std = running.std
+        (self.percent_25, self.percent_50, self.percent_75) = [self.__typed_value(value) for value in percents]
+
+    def __typed_value(self, value):
+        if self.type == ColumnAttributes.Type.string:
+            return int(value)
+        return float(value)
+
     def numeric_value_for_value(self, value):
         if self.type == ColumnAttributes.Type.numeric:
             return float(value)
         
         return self.numeric_values[value]
 
+    def to_dict(self):
+        """Return the attributes as a JSON serializable dictionary."""
+        return {
+            "type": None if self.type is None else self.type.name,
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std,
+            "min": self.minimum,
+            "25%": self.percent_25,
+            "50%": self.percent_50,
+            "75%": self.percent_75,
+            "max": self.maximum
+        }
+
+    @staticmethod
+    def from_dict(data, column):
+        """Return the attributes of a column from a dictionary returned by to_dict."""
+        attributes = ColumnAttributes()
+        attributes.type = None if data["type"] is None else ColumnAttributes.Type[data["type"]]
+        attributes.count = data["count"]
+        attributes.mean = data["mean"]
+        attributes.std = data["std"]
+        attributes.minimum = data["min"]
+        attributes.percent_25 = data["25%"]
+        attributes.percent_50 = data["50%"]
+        attributes.percent_75 = data["75%"]
+        attributes.maximum = data["max"]
+
+        if column.is_mixed:
+            display.warning("Column " + column.name + " contains different value types.")
+        if attributes.type == ColumnAttributes.Type.string:
+            attributes.numeric_values = column.category_codes
+
+        return attributes
+
     def value_for_key(self, name):
         if name == "Type":
             return ColumnAttributes.Type.name_of_type(self.type)
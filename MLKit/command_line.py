@@ -87,6 +87,8 @@ class CommandLine:
         
         if current_flag.require_parameters and len(values) == 0:
             display.error("Flag -" + flag_name + " requires parameters.")
+        elif len(values) == 0:
+            return True
         
         return values if current_flag.has_multiple_values else values[0]
                 
@@ -0,0 +1,168 @@
+from . import logistic_regression
+from . import model
+from . import display
+from multiprocessing import shared_memory
+import concurrent.futures
+import numpy as np
+import os
+
+
+class GridSearchResult:
+
+    """
+    The cross-validated accuracy of a learning rate and a feature set.
+
+    Attributes:
+        feature_names   The features of the models.
+        learning_rate   The learning rate of the models.
+        accuracies      The accuracy of the model of each fold.
+    """
+
+    def __init__(self, feature_names, learning_rate, accuracies):
+        self.feature_names = feature_names
+        self.learning_rate = learning_rate
+        self.accuracies = accuracies
+
+    @property
+    def mean_accuracy(self):
+        return float(np.mean(self.accuracies))
+
+    @property
+    def std_accuracy(self):
+        return float(np.std(self.accuracies))
+
+
+# The arrays shared by the process running GridSearch.run, attached once by each worker process.
+_shared_memories = []
+_shared_arrays = {}
+
+
+def _attach_shared_arrays(descriptors):
+    for (name, (memory_name, shape, dtype)) in descriptors.items():
+        memory = shared_memory.SharedMemory(name=memory_name)
+        _shared_memories.append(memory)
+        _shared_arrays[name] = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+
+
+def _detach_shared_arrays():
+    _shared_arrays.clear()
+    while len(_shared_memories) > 0:
+        _shared_memories.pop().close()
+
+
+def _fold_accuracy(fold, feature_indexes, learning_rate, feature_names, row_names, parameters):
+    """Train a model on the shared rows out of a fold and return its accuracy on the rows of the fold."""
+    X = _shared_arrays["X"]
+    Y = _shared_arrays["Y"]
+    is_training_row = _shared_arrays["folds"] != fold
+
+    regression = logistic_regression.LogisticRegression(learning_rate, **parameters)
+    training_X = X[feature_indexes][:, is_training_row]
+    training_labels = np.array(row_names, dtype=str)[Y[is_training_row]]
+    regression.scaler.fit(training_X, feature_names)
+    regression.imputer.fit(training_X, feature_names, training_labels).transform(training_X, training_labels, copy=False)
+    regression.scaler.transform(training_X, copy=False)
+
+    regression.fit(training_X, Y[is_training_row], feature_names, row_names=row_names)
+    trained_model = model.Model(row_names, feature_names, regression.thetas, regression.scaler.mean,
+                                regression.scaler.std, regression.multi_class, regression.scaler.count,
+                                regression.imputer)
+
+    # The missing values of the fold are filled by the model, as the ones of new rows.
+    test_X = regression.scaler.transform(X[feature_indexes][:, ~is_training_row], copy=False)
+    predicted_values = trained_model.predict(test_X.T)
+    return float(np.mean(predicted_values == np.array(row_names, dtype=object)[Y[~is_training_row]]))
+
+
+class GridSearch:
+
+    """
+    A k-fold cross-validation of every learning rate and feature set. The rows are split once into folds, and the
+    feature matrix is put in shared memory, so that the worker processes training the models don't copy it.
+
+    Attributes:
+        folds       The number of folds.
+        workers     The number of processes training the models. Every core is used if None.
+        parameters  The other parameters of the LogisticRegression models.
+    """
+
+    def __init__(self, folds=5, workers=None, **parameters):
+        if folds < 2:
+            display.error("Number of folds should be greater than 1.")
+        # The parameters are checked once, before the worker processes start.
+        logistic_regression.LogisticRegression(1, **parameters)
+
+        self.folds = folds
+        self.workers = os.cpu_count() if workers is None else workers
+        self.parameters = parameters
+
+    def run(self, X, Y, feature_names, row_names, features_sets, learning_rates):
+        """Cross-validate a features x rows matrix X of shuffled rows and the index Y of the row name of each row.
+        Returns the GridSearchResult of each learning rate and feature set, by decreasing mean accuracy."""
+        for features_set in features_sets:
+            for feature_name in features_set:
+                if feature_name not in feature_names:
+                    display.error("Column " + feature_name + " doesn't exists.")
+
+        arrays = {"X": np.ascontiguousarray(X, dtype=np.float64), "Y": np.ascontiguousarray(Y, dtype=np.int32),
+                  "folds": (np.arange(X.shape[1]) % self.folds).astype(np.int32)}
+        memories = []
+        descriptors = {}
+
+        try:
+            for (name, array) in arrays.items():
+                memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                memories.append(memory)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=memory.buf)[:] = array
+                descriptors[name] = (memory.name, array.shape, array.dtype.str)
+
+            results = self.__run_tasks(descriptors, feature_names, row_names, features_sets, learning_rates)
+        finally:
+            for memory in memories:
+                memory.close()
+                memory.unlink()
+
+        return sorted(results, key=lambda result: result.mean_accuracy, reverse=True)
+
+    def __run_tasks(self, descriptors, feature_names, row_names, features_sets, learning_rates):
+        combinations = []
+        tasks = []
+
+        for features_set in features_sets:
+            # The features keep the order of the DataTable, as in DataTable.train.
+            feature_indexes = [index for (index, name) in enumerate(feature_names) if name in features_set]
+            set_feature_names = [feature_names[index] for index in feature_indexes]
+            for learning_rate in learning_rates:
+                combinations.append((set_feature_names, learning_rate))
+                tasks += [(fold, feature_indexes, learning_rate, set_feature_names, row_names, self.parameters)
+                          for fold in range(self.folds)]
+
+        if self.workers <= 1:
+            _attach_shared_arrays(descriptors)
+            try:
+                accuracies = [_fold_accuracy(*task) for task in tasks]
+            finally:
+                _detach_shared_arrays()
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, initializer=_attach_shared_arrays,
+                                                        initargs=(descriptors,)) as executor:
+                accuracies = list(executor.map(_fold_accuracy, *zip(*tasks)))
+
+        return [GridSearchResult(set_feature_names, learning_rate, accuracies[index * self.folds:(index + 1) * self.folds])
+                for (index, (set_feature_names, learning_rate)) in enumerate(combinations)]
+
+    @staticmethod
+    def display_results(results):
+        """Display the results ranked by mean accuracy."""
+        column_size = 16
+        headers = ["rank", "accuracy", "std", "learning rate"]
+        print("")
+        print("".join(display.attributed_str(display.sized_str(header, column_size), [display.Color.blue])
+                      for header in headers) + display.attributed_str("  features", [display.Color.blue]))
+
+        for (rank, result) in enumerate(results):
+            values = [str(rank + 1), "%.6f" % result.mean_accuracy, "%.6f" % result.std_accuracy,
+                      str(result.learning_rate)]
+            print("".join(display.sized_str(value, column_size) for value in values) + "  " +
+                  ", ".join(result.feature_names))
+        print("")
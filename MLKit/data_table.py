@@ -1,14 +1,17 @@
 from . import file_manager
 from . import column
 from . import logistic_regression
+from . import model
 from . import column_attributes
 from . import display
-import matplotlib.pyplot as plt
-import pandas as pd
-import seaborn as sns
+from . import statistics
+from . import group_by
+from . import profiler
+from . import cross_validation
+from . import scaler
+from . import imputer
 import numpy as np
-import operator
-from sklearn.metrics import accuracy_score
+import concurrent.futures
 
 
 class DataTable:
@@ -16,12 +19,22 @@ class DataTable:
     A representation of a csv file.
     """
 
-    def __init__(self, file_name):
+    def __init__(self, file_name, chunk_size=file_manager.DEFAULT_CHUNK_SIZE, chunk_columns=None, first_row_index=0,
+                 cache=True, columns=None):
+        """Read a csv file by chunks of chunk_size rows. If chunk_columns is given, the DataTable only holds these
+        columns, built from a chunk of the file. If columns is given, only these columns are read. A column is parsed
+        the first time it is used. If cache is True, the columns are memory-mapped from a binary cache of the file,
+        each column being added to the cache the first time it is parsed."""
         self.file_name = file_name
-        file_content = file_manager.get_content_of_file(file_name)
-        columns_dict = file_manager.get_csv_data(file_content)
-
+        self.first_row_index = first_row_index
+        self.__column_names = []
         self.__columns = {}
+        self.__raw_cells = {}
+        self.__file_column_names = None
+        self.__cache_attributes = None
+        self.__computes_attributes = False
+        self.__attributes_model = None
+        self.__groups = {}
         self.train_conditions = None
         self.X = None
         self.Y = None
@@ -30,9 +43,122 @@ class DataTable:
         self.splitted_test_X = None
         self.splitted_test_Y = None
 
-        for (name, values) in columns_dict.items():
-            col = column.Column(name, values)
-            self.__columns[name] = col
+        if chunk_columns is not None:
+            for chunk_column in chunk_columns:
+                self.__column_names.append(chunk_column.name)
+                self.__columns[chunk_column.name] = chunk_column
+            return
+
+        if cache:
+            self.__cache_attributes = {}
+            cached_file = file_manager.get_csv_cache(file_name)
+            if cached_file is not None and self.__load_cache(*cached_file, columns):
+                return
+
+        for (column_names, cells) in file_manager.get_csv_chunks(file_name, chunk_size):
+            with profiler.Profiler.stage("DataTable.read", rows=len(cells[0])):
+                if self.__file_column_names is None:
+                    self.__file_column_names = column_names
+                    self.__column_names = DataTable.__selected_column_names(column_names, columns)
+                    self.__raw_cells = {name: [] for name in self.__column_names if name not in self.__columns}
+                for (name, column_cells) in zip(column_names, cells):
+                    if name in self.__raw_cells:
+                        self.__raw_cells[name].append(np.array(column_cells, dtype=str))
+
+    @staticmethod
+    def __selected_column_names(column_names, columns):
+        return [name for name in column_names if columns is None or name in columns]
+
+    def __load_cache(self, metadata, arrays, columns):
+        """Memory-map the selected columns found in the cache. Returns True if every selected column is cached."""
+        self.__cache_attributes = metadata["attributes"]
+        self.__column_names = DataTable.__selected_column_names(metadata["column_names"], columns)
+
+        for column_metadata in metadata["columns"]:
+            if column_metadata["name"] not in self.__column_names:
+                continue
+            prefix = str(metadata["column_names"].index(column_metadata["name"])) + "."
+            column_arrays = {name[len(prefix):]: array for (name, array) in arrays.items() if name.startswith(prefix)}
+            self.__columns[column_metadata["name"]] = column.Column.from_cache(column_metadata, column_arrays)
+
+        return all(name in self.__columns for name in self.__column_names)
+
+    def __save_cache(self, cached_columns):
+        columns_metadata = []
+        arrays = {}
+
+        for cached_column in cached_columns:
+            (column_metadata, column_arrays) = cached_column.to_cache()
+            columns_metadata.append(column_metadata)
+            prefix = str(self.__file_column_names.index(cached_column.name)) + "."
+            for (name, array) in column_arrays.items():
+                arrays[prefix + name] = array
+
+        file_manager.save_csv_cache(self.file_name, self.__file_column_names, columns_metadata, arrays)
+
+    def __materialize(self, column_names):
+        """Parse the columns not parsed yet and add them to the cache, then compute their attributes if
+        compute_columns_attributes was called."""
+        parsed_columns = []
+
+        for column_name in column_names:
+            raw_cells = self.__raw_cells.pop(column_name, None)
+            if raw_cells is not None:
+                with profiler.Profiler.stage("DataTable.parse_column", rows=sum(map(len, raw_cells))):
+                    builder = column.ColumnBuilder(column_name)
+                    for column_cells in raw_cells:
+                        builder.append(column_cells)
+                    self.__columns[column_name] = builder.build()
+                parsed_columns.append(self.__columns[column_name])
+
+        if self.__cache_attributes is not None and len(parsed_columns) > 0:
+            self.__save_cache(parsed_columns)
+
+        if self.__computes_attributes:
+            columns = [self.__columns[column_name] for column_name in column_names
+                       if column_name in self.__columns and self.__columns[column_name].attributes is None]
+            if len(columns) > 0:
+                self.__compute_attributes(columns)
+
+    @staticmethod
+    def read_chunks(file_name, chunk_size=file_manager.DEFAULT_CHUNK_SIZE, columns=None):
+        """Yield a DataTable for each chunk of chunk_size rows of a csv file, for files that don't fit in memory. The
+        string columns of every chunk share the same codes. If columns is given, only these columns are parsed."""
+        builders = None
+        first_row_index = 0
+
+        for (column_names, cells) in file_manager.get_csv_chunks(file_name, chunk_size):
+            if builders is None:
+                builders = {name: column.ColumnBuilder(name)
+                            for name in DataTable.__selected_column_names(column_names, columns)}
+            for (name, column_cells) in zip(column_names, cells):
+                if name in builders:
+                    builders[name].append(column_cells)
+
+            chunk_columns = [builder.build() for builder in builders.values()]
+            yield DataTable(file_name, chunk_columns=chunk_columns, first_row_index=first_row_index)
+            first_row_index += len(cells[0])
+
+    @staticmethod
+    def read_attributes(file_name, chunk_size=file_manager.DEFAULT_CHUNK_SIZE):
+        """Compute the attributes of the columns of a csv file chunk by chunk, without keeping their values in memory.
+        Returns a DataTable whose columns only hold their attributes."""
+        columns_statistics = []
+
+        for data_table in DataTable.read_chunks(file_name, chunk_size):
+            if len(columns_statistics) == 0:
+                columns_statistics = [statistics.ColumnStatistics(name) for name in data_table.__column_names]
+            for (column_statistics, chunk_column) in zip(columns_statistics, data_table.all_columns()):
+                column_statistics.update(chunk_column)
+
+        attribute_columns = []
+        for column_statistics in columns_statistics:
+            attribute_column = column.Column(column_statistics.name)
+            attribute_column.type = column_statistics.type
+            attribute_column.attributes = column_attributes.ColumnAttributes(statistics=column_statistics)
+            attribute_columns.append(attribute_column)
+
+        return DataTable(file_name, chunk_columns=attribute_columns)
 
     def __str__(self):
         self.display_attributes()
@@ -40,10 +166,13 @@ class DataTable:
 
     def all_columns(self):
         """Return the columns of the DataTable."""
-        return list(self.__columns.values())
+        self.__materialize(self.__column_names)
+        return [self.__columns[column_name] for column_name in self.__column_names]
 
     def column_named(self, column_name):
         """Return the column for a given column name."""
+        if column_name in self.__columns or column_name in self.__raw_cells:
+            self.__materialize([column_name])
         return self.__columns.get(column_name)
 
     def values_for_column_named(self, column_name):
@@ -57,99 +186,113 @@ class DataTable:
         else:
             return column.values
 
+    def group_by(self, column_name):
+        """Return the GroupBy of the rows of the DataTable by the values of a column. It is computed once per column."""
+        groups = self.__groups.get(column_name)
+
+        if groups is None:
+            key_column = self.column_named(column_name)
+            if key_column is None:
+                display.error("Column " + column_name + " doesn't exists.")
+            groups = group_by.GroupBy(key_column)
+            self.__groups[column_name] = groups
+
+        return groups
+
     def values_for_target_column_named(self, column_name, value_names, target_column_names, scaled=False):
         """Return a dictionnary of all the values in a target column, corresponding to the row values of a given
         column. """
-        column = self.column_named(column_name)
+        groups = self.group_by(column_name)
         value_names = list(map(str, value_names))
         target_column_names = list(map(str, target_column_names))
+        target_columns = [self.__existing_column_named(target_column_name) for target_column_name in target_column_names]
         values = {}
 
-        if column is None:
-            display.error("Column " + column_name + " doesn't exists.")
-
-        for index, value in enumerate(column.values):
-            value_str = str(value)
-
-            if value_str in value_names:
-                if values.get(value_str) is None:
-                    values[value_str] = {}
-
-                for target_column_name in target_column_names:
-                    if values[value_str].get(target_column_name) is None:
-                        values[value_str][target_column_name] = []
-
-                    target_column = self.column_named(target_column_name)
-                    if target_column is None:
-                        display.error("Column " + target_column_name + " doesn't exists.")
+        for value_name in value_names:
+            if value_name not in groups:
+                continue
 
-                    if scaled is True:
-                        try:
-                            float_value = float(target_column.scaled_values[index])
-                            values[value_str][target_column_name].append(float_value)
-                        except TypeError:
-                            values[value_str][target_column_name].append(None)
-                    else:
-                        try:
-                            float_value = float(target_column.values[index])
-                            values[value_str][target_column_name].append(float_value)
-                        except TypeError:
-                            values[value_str][target_column_name].append(target_column.values[index])
+            rows = groups.rows_of(value_name)
+            values[value_name] = {}
+            for target_column in target_columns:
+                if scaled is True:
+                    target_values = target_column.scaled_values[rows]
+                    target_values = np.where(np.isnan(target_values), None, target_values)
+                elif target_column.is_numeric():
+                    target_values = np.where(target_column.mask[rows], target_column.data[rows], None)
+                else:
+                    target_values = target_column.labels()[rows]
+                values[value_name][target_column.name] = target_values.tolist()
 
         return values
 
     def feature_values_for_rows_in_target_column(self, target_column_name, row_names, feature_column_names):
         data = {}
-        target_column = self.column_named(target_column_name)
+        groups = self.group_by(target_column_name)
+        feature_columns = [self.__existing_column_named(feature_column_name) for feature_column_name in feature_column_names]
 
-        for row_name in row_names:
-            data[row_name] = []
-            for target_column_index, target_column_value in enumerate(target_column.values):
-                if not target_column_value == row_name:
-                    continue
+        for feature_column in feature_columns:
+            if not feature_column.is_numeric():
+                display.error("Value for column " + feature_column.name + " should be numeric.")
 
-                row_contains_none = False
-
-                for feature_column_name in feature_column_names:
-                    feature_column = self.column_named(feature_column_name)
-                    if feature_column.values[target_column_index] is None:
-                        row_contains_none = True
-                        break
-
-                if row_contains_none:
-                    continue
+        for row_name in row_names:
+            feature_values = groups.values_of(row_name, feature_columns)
+            feature_values = [feature_values[feature_column_name].tolist() for feature_column_name in feature_column_names]
+            data[row_name] = [dict(zip(feature_column_names, row_values)) for row_values in zip(*feature_values)]
 
-                row_columns = {}
+        return data
 
-                for feature_column_name in feature_column_names:
-                    feature_column = self.column_named(feature_column_name)
-                    feature_column_value = feature_column.values[target_column_index]
+    def __existing_column_named(self, column_name):
+        existing_column = self.column_named(column_name)
+        if existing_column is None:
+            display.error("Column " + column_name + " doesn't exists.")
+        return existing_column
+
+    def compute_columns_attributes(self, model=None, workers=None):
+        """Compute the attributes of each column. If workers is greater than 1, the columns are spread over a pool of
+        this number of processes. Otherwise the attributes of a column are computed the first time it is used."""
+        self.__computes_attributes = True
+        self.__attributes_model = model
+
+        if workers is not None and workers > 1:
+            self.__materialize(self.__column_names)
+            columns = [column for column in self.__columns.values() if column.attributes is None]
+            self.__compute_attributes(columns, workers)
+
+    def __compute_attributes(self, columns, workers=None):
+        model = self.__attributes_model
+        cached_attributes = {} if self.__cache_attributes is None else self.__cache_attributes
+        computed_columns = []
+
+        for table_column in columns:
+            if table_column.name in cached_attributes:
+                attributes = column_attributes.ColumnAttributes.from_dict(cached_attributes[table_column.name],
+                                                                          table_column)
+                table_column.compute_attributes(model, attributes=attributes)
+            else:
+                computed_columns.append(table_column)
 
-                    try:
-                        float_value = float(feature_column_value)
-                        row_columns[feature_column_name] = float_value
-                    except TypeError:
-                        display.error("Value for column " + feature_column_name + " should be numeric.")
+        if len(computed_columns) == 0:
+            return
 
-                data[row_name].append(row_columns)
+        if workers is None or workers <= 1:
+            for table_column in computed_columns:
+                table_column.compute_attributes(model)
+        else:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                columns_attributes = list(executor.map(column_attributes.ColumnAttributes, computed_columns))
 
-        return data
+            for (table_column, attributes) in zip(computed_columns, columns_attributes):
+                table_column.compute_attributes(model, attributes=attributes)
 
-    def compute_columns_attributes(self, model=None):
-        """Compute the attributes of each column."""
-        for column in self.__columns.values():
-            column.compute_attributes(model)
+        if self.__cache_attributes is not None:
+            attributes = {table_column.name: table_column.attributes.to_dict() for table_column in computed_columns}
+            self.__cache_attributes.update(attributes)
+            file_manager.update_csv_cache_attributes(self.file_name, attributes)
 
     def set_train_condition(self, target_column_name, features_column_names):
         """Define the feature columns that will be used for train based on the row values of the target column."""
-        target_column = self.column_named(target_column_name)
-        row_names = []
-
-        for row_value in target_column.values:
-            if row_value not in row_names:
-                row_names.append(row_value)
-
-        for row_name in row_names:
+        for row_name in self.group_by(target_column_name).names:
             self.add_train_condition(row_name, features_column_names)
 
     def add_train_condition(self, row_name, features_column_names):
@@ -159,135 +302,273 @@ class DataTable:
 
         self.train_conditions[row_name] = features_column_names
 
-    def train(self, target_column_name, features_column_names, file_name, learning_rate=0.1, accuracy_split=None):
+    @profiler.Profiler.profiled("DataTable.train")
+    def train(self, target_column_name, features_column_names, file_name, learning_rate=0.1, accuracy_split=None,
+              multi_class="ovr", batch_size=None, epochs=100, shuffle=True, optimizer="gd", imputation="mean"):
         if not 1 >= learning_rate > 0:
             display.error("Learning rate should be greater than 0 and smaller than 1.")
 
         if accuracy_split is not None and (accuracy_split < 0.01 or accuracy_split > 0.99):
             display.error("Accuracy split should be greater than 0 and smaller than 1.")
 
-        if self.column_named(target_column_name) is None:
-            display.error("Column " + target_column_name + " doesn't exists.")
-
-        for feature_column_name in features_column_names:
-            if self.column_named(feature_column_name) is None:
-                display.error("Column " + feature_column_name + " doesn't exists.")
+        (feature_names, row_names, self.X, Y_codes) = self.__training_data(target_column_name, features_column_names)
+        self.Y = np.array(row_names, dtype=str)[Y_codes]
 
-        target_column = self.column_named(target_column_name)
-        feature_columns = [self.column_named(column_name) for column_name in list(self.__columns.keys()) if
-                           column_name in features_column_names]
-        feature_names = [column.name for column in feature_columns]
-        X = [column.values for column in feature_columns]
-
-        for index, _ in enumerate(X):
-            column = self.column_named(features_column_names[index])
-            X[index] = [(column.attributes.mean if value is None else value) for value in X[index]]
-        
-        X = np.asarray(X).astype('float')
-        Y = np.asarray(target_column.values)
-        X = X.T
-        Y = np.array([Y]).reshape((Y.shape[0], 1))
-        united_values = np.c_[X.reshape(len(X), -1), Y.reshape(len(Y), -1)]
-        np.random.shuffle(united_values)
-
-        self.X = united_values[:, :-1].astype('float').T
-        self.Y = united_values[:, -1:].reshape(len(X))
+        regression = logistic_regression.LogisticRegression(learning_rate, multi_class=multi_class,
+                                                            batch_size=batch_size, epochs=epochs, shuffle=shuffle,
+                                                            optimizer=optimizer, imputation=imputation)
+        regression.scaler = scaler.StandardScaler(feature_names)
+        regression.imputer = imputer.Imputer(imputation, feature_names)
 
         if accuracy_split is None:
-            regression = logistic_regression.LogisticRegression(learning_rate)
-            for index, val in enumerate(features_column_names):
-                regression.mean[val] = np.mean(self.X[index])
-                regression.std[val] = np.std(self.X[index])
-                self.X[index] = (self.X[index] - regression.mean[val]) / regression.std[val]
-            regression.fit(self.X, self.Y, feature_names)
+            DataTable.__fit_statistics(regression.scaler, regression.imputer, self.X, self.Y)
+            regression.imputer.transform(self.X, self.Y, copy=False)
+            regression.scaler.transform(self.X, copy=False)
+            regression.fit(self.X, Y_codes, feature_names, row_names=row_names)
             regression.save(file_name)
         else:
             self.splitted_X = self.X[:, :int(self.X.shape[1] * accuracy_split)]
             self.splitted_Y = self.Y[:int(self.Y.shape[0] * accuracy_split)]
             self.splitted_test_X = self.X[:, int(self.X.shape[1] * accuracy_split):]
             self.splitted_test_Y = self.Y[int(self.Y.shape[0] * accuracy_split):]
-            regression = logistic_regression.LogisticRegression(learning_rate)
-            for index, val in enumerate(features_column_names):
-                regression.mean[val] = np.mean(self.splitted_test_X[index])
-                regression.std[val] = np.std(self.splitted_test_X[index])
-                self.splitted_X[index] = (self.splitted_X[index] - regression.mean[val]) / regression.std[val]
-                self.splitted_test_X[index] = (self.splitted_test_X[index] - regression.mean[val]) / regression.std[val]
-            regression.fit(self.splitted_X, self.splitted_Y, feature_names)
+            # The test rows are scaled and imputed with the statistics of the training rows, as new rows would be.
+            DataTable.__fit_statistics(regression.scaler, regression.imputer, self.splitted_X, self.splitted_Y)
+            regression.imputer.transform(self.splitted_X, self.splitted_Y, copy=False)
+            regression.scaler.transform(self.X, copy=False)
+            regression.fit(self.splitted_X, Y_codes[:self.splitted_Y.shape[0]], feature_names, row_names=row_names)
             regression.save(file_name)
 
         display.success("model saved as " + file_name + ".mlmodel")
+
+    @staticmethod
+    def __fit_statistics(features_scaler, features_imputer, X, labels):
+        """Add the rows of a features x rows matrix X of raw values, where nan is a missing value, and their class labels
+        to the statistics of a StandardScaler and to the fill values of an Imputer. Both see the raw values: the scaler
+        counts the missing values as rows at the mean, whatever the imputation strategy."""
+        features_scaler.partial_fit(X)
+        features_imputer.partial_fit(X, labels)
+
+    def __training_data(self, target_column_name, features_column_names):
+        """Return the feature names in the order of the DataTable, the sorted row names of the target column, the
+        features x rows matrix of the shuffled rows having a target value, missing values being nan, and the index of
+        the row name of each of these rows."""
+        self.__check_columns(target_column_name, features_column_names)
+
+        target_column = self.column_named(target_column_name)
+        feature_columns = [self.column_named(column_name) for column_name in self.__column_names if
+                           column_name in features_column_names]
+        feature_names = [column.name for column in feature_columns]
+
+        # The model rows are sorted by name: the codes of the target dictionary are remapped to the sorted names.
+        (row_names, codes) = target_column.encoded()
+        sorted_indexes = np.argsort(np.array(row_names, dtype=str), kind="stable")
+        sorted_codes = np.empty(len(row_names), dtype=np.int32)
+        sorted_codes[sorted_indexes] = np.arange(len(row_names), dtype=np.int32)
+        row_names = [row_names[index] for index in sorted_indexes]
+
+        rows = np.flatnonzero(codes >= 0)
+        rows = rows[np.random.permutation(rows.shape[0])]
+        Y_codes = sorted_codes[codes[rows]]
+
+        X = np.array([column.numeric_data(rows) for column in feature_columns], dtype=np.float64)
+        return feature_names, row_names, X, Y_codes
+
+    @profiler.Profiler.profiled("DataTable.cross_validate")
+    def cross_validate(self, target_column_name, features_sets, learning_rates, folds=5, workers=None,
+                       multi_class="ovr", batch_size=None, epochs=100, shuffle=True, optimizer="gd", imputation="mean"):
+        """Train a model for each fold, learning rate and feature set, on the rows out of the fold, and measure its
+        accuracy on the rows of the fold. The models are trained by a pool of workers processes. Returns the
+        cross_validation.GridSearchResult of each learning rate and feature set, by decreasing mean accuracy."""
+        for learning_rate in learning_rates:
+            if not 1 >= learning_rate > 0:
+                display.error("Learning rate should be greater than 0 and smaller than 1.")
+
+        features_column_names = [name for name in self.__column_names
+                                 if any(name in features_set for features_set in features_sets)]
+        (feature_names, row_names, X, Y_codes) = self.__training_data(target_column_name, features_column_names)
+        if X.shape[1] < folds:
+            display.error("Column " + target_column_name + " should contain at least one value per fold.")
+
+        grid_search = cross_validation.GridSearch(folds, workers, multi_class=multi_class, batch_size=batch_size,
+                                                  epochs=epochs, shuffle=shuffle, optimizer=optimizer,
+                                                  imputation=imputation)
+        return grid_search.run(X, Y_codes, feature_names, row_names, features_sets, learning_rates)
+
+    @staticmethod
+    @profiler.Profiler.profiled("DataTable.train_file")
+    def train_file(file_name, target_column_name, features_column_names, output_file_name, learning_rate=0.1,
+                   chunk_size=file_manager.DEFAULT_CHUNK_SIZE, multi_class="ovr", batch_size=None, epochs=100,
+                   shuffle=True, optimizer="gd", initial_model=None, imputation="mean"):
+        """Train a model chunk by chunk, without loading the csv file in memory. A first pass over the file computes the
+        mean and standard deviation of the features and their fill values, each following pass runs mini-batch updates
+        on every chunk. Rows without target value are ignored. If a compiled initial_model is given, its thetas are
+        updated with the rows of the file instead of starting from zero, and its feature statistics are merged with the
+        ones of the file, as are its fill values."""
+        if not 1 >= learning_rate > 0:
+            display.error("Learning rate should be greater than 0 and smaller than 1.")
+
+        if optimizer not in logistic_regression.LogisticRegression.partial_optimizers:
+            display.error("The " + optimizer + " optimizer needs every row at once. Use one of " +
+                          ", ".join(logistic_regression.LogisticRegression.partial_optimizers) +
+                          " to train by chunks or update a model.")
+
+        if initial_model is not None and list(features_column_names) != initial_model.feature_names:
+            display.error("The features should be the features of the model: " + ", ".join(initial_model.feature_names))
+
+        if initial_model is None:
+            regression = logistic_regression.LogisticRegression(learning_rate, multi_class=multi_class,
+                                                                batch_size=batch_size, epochs=epochs, shuffle=shuffle,
+                                                                optimizer=optimizer, imputation=imputation)
+            features_scaler = scaler.StandardScaler(features_column_names)
+            regression.imputer = imputer.Imputer(regression.imputer.strategy, features_column_names)
+        else:
+            regression = logistic_regression.LogisticRegression.from_model(initial_model, learning_rate,
+                                                                           batch_size=batch_size, epochs=epochs,
+                                                                           shuffle=shuffle, optimizer=optimizer)
+            features_scaler = regression.scaler.copy()
+
+        row_names = set()
+        row_count = 0
+
+        columns = [target_column_name] + list(features_column_names)
+
+        for data_table in DataTable.read_chunks(file_name, chunk_size, columns=columns):
+            data_table.__check_columns(target_column_name, features_column_names)
+            target_column = data_table.column_named(target_column_name)
+            rows = target_column.mask
+            labels = target_column.labels()[rows].astype(str)
+            row_names.update(labels.tolist())
+            row_count += int(rows.sum())
+            X = np.array([data_table.column_named(name).numeric_data()[rows] for name in features_column_names])
+            DataTable.__fit_statistics(features_scaler, regression.imputer, X, labels)
+
+        if row_count == 0:
+            display.error("Column " + target_column_name + " doesn't contain any value.")
+
+        row_names = sorted(row_names)
+
+        if initial_model is None:
+            regression.scaler = features_scaler
+        else:
+            regression.rescale(features_scaler)
+            regression.add_row_names(row_names, features_column_names)
+            row_names = regression.row_names.tolist()
+
+        prev_costs = None
+
+        for _ in range(epochs):
+            costs = np.zeros(len(row_names))
+
+            for data_table in DataTable.read_chunks(file_name, chunk_size, columns=columns):
+                target_column = data_table.column_named(target_column_name)
+                rows = target_column.mask
+                X = np.array([data_table.column_named(name).numeric_data()[rows] for name in features_column_names])
+                Y = target_column.labels()[rows].astype(str)
+                X = features_scaler.transform(regression.imputer.transform(X, Y, copy=False), copy=False)
+                if Y.shape[0] > 0:
+                    costs += regression.partial_fit(X, Y, row_names, features_column_names) * Y.shape[0]
+
+            costs /= row_count
+            if prev_costs is not None and np.abs(costs - prev_costs).max() <= logistic_regression.LogisticRegression.tolerance:
+                break
+            prev_costs = costs
+
+        regression.save(output_file_name)
+        display.success("model saved as " + output_file_name + ".mlmodel")
+
+    def __check_columns(self, target_column_name, features_column_names):
+        if self.column_named(target_column_name) is None:
+            display.error("Column " + target_column_name + " doesn't exists.")
+
+        for feature_column_name in features_column_names:
+            if self.column_named(feature_column_name) is None:
+                display.error("Column " + feature_column_name + " doesn't exists.")
     
     def accuracy(self, model_file_name):
         if self.splitted_X is None or self.splitted_Y is None or self.splitted_test_X is None or self.splitted_test_Y is None:
             display.error("Use -a to get the model accuracy.")
         
-        model = file_manager.get_model_data(model_file_name + ".mlmodel")
-        feature_column_names = list(model["rows"][list(model["rows"].keys())[0]].keys())
-        predicted_values = []
-
-        for row_index in range(self.splitted_test_Y.shape[0]):
-            predicted_value = self.__predcited_value(self.splitted_test_X, row_index, feature_column_names, model)
-            predicted_values.append(predicted_value)
+        trained_model = model.Model.load(model_file_name + ".mlmodel")
+        predicted_values = trained_model.predict(self.splitted_test_X.T)
 
+        # sklearn is only imported by the paths using it: importing it costs more than most commands.
+        from sklearn.metrics import accuracy_score
         accuracy = accuracy_score(self.splitted_test_Y, predicted_values)
         print("Accuracy:", accuracy)
 
-    def predict(self, target_column_name, model):
-        """Predict values of a target column from a .mlmodel file."""
-        feature_column_names = list(model["attributes"]["mean"].keys())
-        target_column = self.column_named(target_column_name)
-        feature_columns = [self.column_named(column_name) for column_name in feature_column_names]
-
+    @profiler.Profiler.profiled("DataTable.predict")
+    def predict(self, target_column_name, trained_model, verbose=True):
+        """Predict values of a target column from a compiled .mlmodel file. Returns the rows x classes probabilities of
+        the row names of the model, the predicted value being the most probable one."""
         if self.column_named(target_column_name) is None:
             display.error("Column " + target_column_name + " doesn't exists.")
 
-        for feature_column_name in feature_column_names:
+        for feature_column_name in trained_model.feature_names:
             if self.column_named(feature_column_name) is None:
                 display.error("Column " + feature_column_name + " doesn't exists.")
 
+        feature_columns = [self.column_named(column_name) for column_name in trained_model.feature_names]
         X = np.array([column.scaled_values for column in feature_columns])
-        for row_index in range(X.shape[1]):
-            target_column.values[row_index] = self.__predcited_value(X, row_index, feature_column_names, model)
+        probabilities = trained_model.predict_probabilities(X.T)
+        predicted_values = np.array(trained_model.row_names, dtype=object)[np.argmax(probabilities, axis=1)]
+        self.__columns[target_column_name] = column.Column(target_column_name, predicted_values.tolist())
+        self.__groups.pop(target_column_name, None)
+
+        if verbose:
+            display.success("Predicted values")
+
+        return probabilities
+
+    @staticmethod
+    def predict_file(file_name, target_column_name, trained_model, output_file_name="houses.csv",
+                     chunk_size=file_manager.DEFAULT_CHUNK_SIZE, all_probabilities=False, top_k=None):
+        """Predict values of a target column chunk by chunk, writing each chunk to the output csv file. The
+        probability columns of Model.probability_columns are written after the predicted value if all_probabilities
+        is True or top_k is given."""
+        columns = [target_column_name] + trained_model.feature_names
+        output_file_name = DataTable.__csv_file_name(output_file_name)
+        with_probabilities = all_probabilities or top_k is not None
+        probability_column_names = list(trained_model.probability_columns(
+            np.empty((0, len(trained_model.row_names))), all_probabilities, top_k).keys())
+
+        with file_manager.CsvWriter(output_file_name, ["Index", target_column_name] + probability_column_names,
+                                    decimals=6 if with_probabilities else None) as writer:
+            for data_table in DataTable.read_chunks(file_name, chunk_size, columns=columns):
+                data_table.compute_columns_attributes(model=trained_model)
+                probabilities = data_table.predict(target_column_name, trained_model, verbose=False)
+                data_table.write(writer, target_column_name,
+                                 trained_model.probability_columns(probabilities, all_probabilities, top_k)
+                                 if with_probabilities else None)
 
         display.success("Predicted values")
-
-    def __predcited_value(self, X, row_index, feature_column_names, model):
-        row_probabilities = {}
-        for row_name in list(model["rows"].keys()):
-            row_probabilities[row_name] = 0
-            for column_index, column_name in enumerate(model["rows"][row_name].keys()):
-                if column_name == "t0":
-                    row_probabilities[row_name] += model["rows"][row_name]["t0"]
-                    continue
-                else:
-                    column_theta = model["rows"][row_name][column_name]
-                    column_value = X[column_index - 1][row_index]
-                    replacement_value = model["attributes"]["mean"][column_name]
-                    float_column_value = replacement_value if column_value is None else float(column_value)
-                    row_probabilities[row_name] += column_theta * float_column_value
-
-            row_probabilities[row_name] = logistic_regression.LogisticRegression.predict(row_probabilities[row_name])
-
-        sorted_row_probabilities = sorted(row_probabilities.items(), key=operator.itemgetter(1), reverse=True)
-        return sorted_row_probabilities[0][0]
-
-    def save(self, target_column_name="Hogwarts House", file_name="houses.csv"):
-        """Update the current csv file or create a new one if a file name is provided."""
-        final_string = "Index," + target_column_name
-
-        for index, value in enumerate(self.values_for_column_named(target_column_name)):
-            final_string += "\n" + str(index) + "," + str(value)
-        
-        if file_name is None:
-            file_manager.save_string(final_string, self.file_name)
-            display.success("Saved csv file in " + self.file_name)
-        else:
-            if ".csv" in file_name:
-                file_manager.save_string(final_string, file_name)
-                display.success("Saved csv file in " + file_name)
-            else:
-                file_manager.save_string(final_string, file_name + ".csv")
-                display.success("Saved csv file in " + file_name + ".csv")
+        display.success("Saved csv file in " + output_file_name)
+
+    @profiler.Profiler.profiled("DataTable.save")
+    def save(self, target_column_name="Hogwarts House", file_name="houses.csv", verbose=True, extra_columns=None,
+             decimals=None):
+        """Update the current csv file or create a new one if a file name is provided. The index and the target value
+        of each row are written, then the extra_columns, a dict of the values of each row by column name, such as the
+        probabilities of each class. The float values are rounded to decimals if it is given."""
+        extra_columns = {} if extra_columns is None else extra_columns
+        output_file_name = self.file_name if file_name is None else DataTable.__csv_file_name(file_name)
+
+        with file_manager.CsvWriter(output_file_name, ["Index", target_column_name] + list(extra_columns.keys()),
+                                    decimals=decimals) as writer:
+            self.write(writer, target_column_name, extra_columns)
+
+        if verbose:
+            display.success("Saved csv file in " + output_file_name)
+
+    def write(self, writer, target_column_name, extra_columns=None):
+        """Write the index, the target value and the extra_columns values of each row to a file_manager.CsvWriter."""
+        values = self.values_for_column_named(target_column_name)
+        extra_values = [] if extra_columns is None else list(extra_columns.values())
+        writer.write_columns([np.arange(self.first_row_index, self.first_row_index + len(values)), values] +
+                             extra_values)
+
+    @staticmethod
+    def __csv_file_name(file_name):
+        return file_name if ".csv" in file_name else file_name + ".csv"
 
     def display_attributes(self, from_index=0, to_index=-1):
         """display the calculated attributes."""
@@ -303,10 +584,10 @@ class DataTable:
         attributes_name = column_attributes.ColumnAttributes.all()
 
         line_str = display.sized_str("", first_column_size)
-        for (index, column) in enumerate(columns):
+        for (index, table_column) in enumerate(columns):
             if not (from_index <= index < to_index):
                 continue
-            sized_str = display.sized_str(column.name + " ", column_size)
+            sized_str = display.sized_str(table_column.name + " ", column_size)
             line_str += display.attributed_str(sized_str, [display.Color.blue])
 
         print("")
@@ -322,11 +603,11 @@ class DataTable:
             sized_str = display.sized_str(attribute_name + "|", first_column_size)
             line_str = display.attributed_str(sized_str, [display.Style.bold])
 
-            for (index, column) in enumerate(columns):
+            for (index, table_column) in enumerate(columns):
                 if not (from_index <= index < to_index):
                     continue
 
-                attribute_value = column.attributes.value_for_key(attribute_name)
+                attribute_value = table_column.attributes.value_for_key(attribute_name)
                 if isinstance(attribute_value, float):
                     if abs(attribute_value) == float("inf"):
                         line_str += display.sized_str("-", column_size)
@@ -346,7 +627,8 @@ class DataTable:
         print("")
 
     def display_histogram(self, target_column, row_names, feature_names, scaled=False):
-        """display an histogram for rows in columns."""
+        """display an histogram for rows in columns. If scaled is True, the values of each feature are scaled to a zero
+        mean and a unit standard deviation."""
         column_len = len(feature_names)
         n_columns = 4 if column_len > 4 else column_len
         n_rows = column_len / 4
@@ -354,23 +636,34 @@ class DataTable:
         if column_len % 4 != 0:
             n_rows += 1
 
-        data = self.values_for_target_column_named(target_column, row_names, feature_names, scaled=scaled)
+        import matplotlib.pyplot as plt
+        groups = self.group_by(target_column)
         fig, axs = plt.subplots(nrows=int(n_rows), ncols=int(n_columns), figsize=(15, 10))
 
+        for row in row_names:
+            if row not in groups:
+                display.error("Value " + row + " doesn't exist in column " + target_column)
+
+        features_scaler = None
+        if scaled:
+            features_scaler = scaler.StandardScaler().fit(
+                [self.__existing_column_named(column_name).numeric_data() for column_name in feature_names],
+                feature_names)
+
         for index, column_name in enumerate(feature_names):
+            feature_column = self.__existing_column_named(column_name)
             for row in row_names:
-                try:
-                    data[row][column_name] = [x for x in data[row][column_name] if x is not None]
-                except KeyError:
-                    display.error("Value " + row + " doesn't exist in column " + target_column)
+                values = groups.values_of(row, [feature_column])[column_name]
+                if features_scaler is not None:
+                    values = features_scaler.transform_values(column_name, values)
 
                 if int(n_rows) == 1:
                     if column_len == 1:
-                        axs.hist(data[row][column_name], alpha=0.4, label=row)
+                        axs.hist(values, alpha=0.4, label=row)
                     else:
-                        axs[index].hist(data[row][column_name], alpha=0.4, label=row)
+                        axs[index].hist(values, alpha=0.4, label=row)
                 else:
-                    axs[int(index / 4)][index % 4].hist(data[row][column_name], alpha=0.4, label=row)
+                    axs[int(index / 4)][index % 4].hist(values, alpha=0.4, label=row)
             if int(n_rows) == 1:
                 if column_len == 1:
                     axs.title.set_text(column_name)
@@ -388,6 +681,9 @@ class DataTable:
         plt.show()
 
     def display_pair_plot(self, target_column_name, feature_names):
+        import matplotlib.pyplot as plt
+        import pandas as pd
+        import seaborn as sns
         csv_data = pd.read_csv(self.file_name)
         csv_data.dropna(axis=0, how="any", inplace=True)
 
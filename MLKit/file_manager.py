@@ -1,6 +1,17 @@
 from . import display
+from . import profiler
+import numpy as np
+import itertools
+import hashlib
+import shutil
 import csv
 import json
+import os
+
+
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_CACHE_SIZE = 2 * 1024 ** 3
+DEFAULT_WRITE_BUFFER_SIZE = 1024 ** 2
 
 
 def fd(file_name, option):
@@ -10,39 +21,104 @@ def fd(file_name, option):
         display.error("No such file named " + file_name)
 
 
-def get_content_of_file(file_name):
+def get_csv_chunks(file_name, chunk_size=DEFAULT_CHUNK_SIZE, delimiter=","):
+    """Stream a csv file by chunks of rows. Yields the column names and a tuple of raw cells for each column."""
+    if chunk_size < 1:
+        display.error("Chunk size should be greater than 0.")
+
     file_descriptor = fd(file_name, "r")
-    content = file_descriptor.readlines()
-    file_descriptor.close()
-    return content
 
+    with file_descriptor:
+        reader = csv.reader(file_descriptor, delimiter=delimiter)
+        column_names = next(reader, None)
+        if column_names is None:
+            return
 
-def get_csv_data(file_content, delimiter=","):
-    if file_content == None:
-        return None
-    
-    columns = dict()
-    csv_content = csv.DictReader(file_content, delimiter=delimiter)
-    
-    for row in csv_content:
-        for (key, value) in row.items():
-            if columns.get(key) is None:
-                columns[key] = []
-            try:
-                if len(value) == 0:
-                    columns[key].append(None)
-                else:
-                    columns[key].append(value)
-            except TypeError:
-                display.error("The file is not correctly formated.")
-
-    return columns
-
-
-def save_string(string, file_name):
-    file_descriptor = fd(file_name, "w+")
-    file_descriptor.write(string)
-    file_descriptor.close()
+        while True:
+            with profiler.Profiler.stage("file_manager.get_csv_chunks") as stage:
+                rows = list(itertools.islice(reader, chunk_size))
+                read_count = len(rows)
+                rows = [row for row in rows if len(row) > 0]
+                for row in rows:
+                    if len(row) != len(column_names):
+                        display.error("The file is not correctly formated.")
+                stage.rows += len(rows)
+
+            if read_count == 0:
+                break
+
+            if len(rows) > 0:
+                yield column_names, list(zip(*rows))
+
+
+class CsvWriter:
+
+    """
+    Streams rows to a csv file from columns of values. The rows are formatted by the csv module, DEFAULT_CHUNK_SIZE rows
+    at a time, and written through a buffer of buffer_size bytes, so that writing millions of rows doesn't build them in
+    memory. The rows are written to a temporary file renamed to file_name when the writer is closed: readers never see
+    a partially written file, and an interrupted write leaves the previous file unchanged.
+
+    Attributes:
+        file_name   The name of the csv file.
+        decimals    The number of decimals the float values are rounded to. They are written in full if None.
+        row_count   The number of rows written, without the header.
+    """
+
+    def __init__(self, file_name, column_names, buffer_size=DEFAULT_WRITE_BUFFER_SIZE, decimals=None):
+        self.file_name = file_name
+        self.decimals = decimals
+        self.row_count = 0
+        self.__temporary_file_name = file_name + ".tmp" + str(os.getpid())
+
+        try:
+            self.__file = open(self.__temporary_file_name, "w", newline="", buffering=buffer_size)
+        except IOError:
+            display.error("Can't write the file " + file_name)
+
+        self.__writer = csv.writer(self.__file, lineterminator="\n")
+        self.__writer.writerow(column_names)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception, traceback):
+        if exception_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def write_columns(self, columns):
+        """Write the rows of columns of the same length, each one a list or an array."""
+        row_count = len(columns[0])
+
+        with profiler.Profiler.stage("file_manager.CsvWriter", rows=row_count):
+            for start in range(0, row_count, DEFAULT_CHUNK_SIZE):
+                cells = [self.__cells(column[start:start + DEFAULT_CHUNK_SIZE]) for column in columns]
+                self.__writer.writerows(zip(*cells))
+        self.row_count += row_count
+
+    def __cells(self, values):
+        if not isinstance(values, np.ndarray):
+            return values
+        if self.decimals is not None and values.dtype.kind == "f":
+            values = np.round(values, self.decimals)
+        return values.tolist()
+
+    def close(self):
+        """Write the buffered rows and replace the csv file by the written one."""
+        self.__file.close()
+        try:
+            os.replace(self.__temporary_file_name, self.file_name)
+        except OSError:
+            self.discard()
+            display.error("Can't write the file " + self.file_name)
+
+    def discard(self):
+        """Remove the written rows, keeping the csv file unchanged."""
+        self.__file.close()
+        if os.path.exists(self.__temporary_file_name):
+            os.remove(self.__temporary_file_name)
 
 
 def get_model_data(file_name):
@@ -54,3 +130,146 @@ def save_model_data(data, file_name):
     file_descriptor = fd(file_name + ".mlmodel", "w+")
     json.dump(data, file_descriptor)
     file_descriptor.close()
+
+
+def get_model_binary(file_name):
+    try:
+        with np.load(file_name, allow_pickle=False) as arrays:
+            return {name: arrays[name] for name in arrays.files}
+    except IOError:
+        display.error("No such file named " + file_name)
+
+
+def save_model_binary(arrays, file_name):
+    file_descriptor = fd(file_name + ".mlmodel.npz", "wb")
+    np.savez(file_descriptor, **arrays)
+    file_descriptor.close()
+
+
+def cache_directory():
+    """Return the directory of the csv cache, set by the MLKIT_CACHE_DIR environment variable. An empty variable
+    disables the cache."""
+    directory = os.environ.get("MLKIT_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "mlkit"))
+    return directory if len(directory) > 0 else None
+
+
+def _cache_entry_directory(file_name):
+    directory = cache_directory()
+    if directory is None:
+        return None
+
+    try:
+        file_stat = os.stat(file_name)
+    except OSError:
+        return None
+
+    key = os.path.abspath(file_name) + ":" + str(file_stat.st_size) + ":" + str(file_stat.st_mtime_ns)
+    return os.path.join(directory, hashlib.sha256(key.encode()).hexdigest())
+
+
+def get_csv_cache(file_name):
+    """Return the metadata and the memory-mapped arrays cached for a csv file, or None if the file changed since it was
+    cached. The metadata holds the column names of the file, the metadata of the cached columns and their attributes."""
+    entry_directory = _cache_entry_directory(file_name)
+    metadata = None if entry_directory is None else _cache_metadata(entry_directory)
+    if metadata is None:
+        return None
+
+    try:
+        arrays = {name: np.load(os.path.join(entry_directory, name + ".npy"), mmap_mode="r")
+                  for name in metadata["arrays"]}
+        os.utime(os.path.join(entry_directory, "metadata.json"))
+    except (IOError, ValueError):
+        return None
+
+    return metadata, arrays
+
+
+def save_csv_cache(file_name, column_names, columns_metadata, arrays):
+    """Add columns of a csv file to its cache, keeping the columns already cached, then evict the least recently used
+    entries above the MLKIT_CACHE_SIZE bytes limit. column_names are the names of every column of the file."""
+    entry_directory = _cache_entry_directory(file_name)
+    if entry_directory is None:
+        return
+
+    try:
+        metadata = _cache_metadata(entry_directory)
+        if metadata is None:
+            # A new entry, or an entry left broken by an older version or an interrupted process.
+            shutil.rmtree(entry_directory, ignore_errors=True)
+            metadata = {"column_names": list(column_names), "columns": [], "attributes": {}, "arrays": []}
+
+        os.makedirs(entry_directory, exist_ok=True)
+        for (name, array) in arrays.items():
+            temporary_file_name = os.path.join(entry_directory, name + ".tmp" + str(os.getpid()) + ".npy")
+            np.save(temporary_file_name, array)
+            os.replace(temporary_file_name, os.path.join(entry_directory, name + ".npy"))
+
+        cached_column_names = {column_metadata["name"] for column_metadata in columns_metadata}
+        metadata["columns"] = [column_metadata for column_metadata in metadata["columns"]
+                               if column_metadata["name"] not in cached_column_names] + list(columns_metadata)
+        metadata["arrays"] = sorted(set(metadata["arrays"]) | set(arrays.keys()))
+        _save_cache_metadata(entry_directory, metadata)
+    except OSError:
+        # The cache directory isn't writable.
+        return
+
+    _evict_csv_cache(int(os.environ.get("MLKIT_CACHE_SIZE", DEFAULT_CACHE_SIZE)))
+
+
+def update_csv_cache_attributes(file_name, attributes):
+    """Add the attributes of columns, by column name, to the cache of a csv file."""
+    entry_directory = _cache_entry_directory(file_name)
+    metadata = None if entry_directory is None else _cache_metadata(entry_directory)
+    if metadata is None:
+        return
+
+    metadata["attributes"].update(attributes)
+    try:
+        _save_cache_metadata(entry_directory, metadata)
+    except OSError:
+        return
+
+
+def _cache_metadata(entry_directory):
+    """Return the metadata of a cache entry, or None if the entry doesn't exist or is broken."""
+    try:
+        with open(os.path.join(entry_directory, "metadata.json"), "r") as file_descriptor:
+            metadata = json.load(file_descriptor)
+    except (IOError, ValueError):
+        return None
+
+    if not isinstance(metadata, dict) or any(key not in metadata for key in ["column_names", "columns", "attributes",
+                                                                           "arrays"]):
+        return None
+    if not all(os.path.exists(os.path.join(entry_directory, name + ".npy")) for name in metadata["arrays"]):
+        return None
+    return metadata
+
+
+def _save_cache_metadata(entry_directory, metadata):
+    metadata_file_name = os.path.join(entry_directory, "metadata.json")
+    temporary_file_name = metadata_file_name + ".tmp" + str(os.getpid())
+    with open(temporary_file_name, "w") as file_descriptor:
+        json.dump(metadata, file_descriptor)
+    os.replace(temporary_file_name, metadata_file_name)
+
+
+def _evict_csv_cache(max_size):
+    directory = cache_directory()
+    entries = []
+
+    for entry_name in os.listdir(directory):
+        entry_directory = os.path.join(directory, entry_name)
+        metadata_file_name = os.path.join(entry_directory, "metadata.json")
+        if not os.path.exists(metadata_file_name):
+            continue
+        size = sum(entry.stat().st_size for entry in os.scandir(entry_directory) if entry.is_file())
+        entries.append((os.path.getmtime(metadata_file_name), size, entry_directory))
+
+    total_size = sum(size for (_, size, _) in entries)
+    for (_, size, entry_directory) in sorted(entries):
+        if total_size <= max_size:
+            break
+        shutil.rmtree(entry_directory, ignore_errors=True)
+        total_size -= size
@@ -0,0 +1,66 @@
+import numpy as np
+
+
+class GroupBy:
+
+    """
+    The rows of a DataTable grouped by the values of a column. The groups are computed once, with a single stable
+    argsort of the column codes, and the row indexes of each group are kept sorted. Only the values present in the
+    column make a group. The groups of a numeric column can be named by any text of their number, "1" being the
+    group "1.0".
+
+    Attributes:
+        column_name The name of the grouped column.
+        names       The names of the groups. The values of a string column in order of appearance, or the sorted
+                    values of a numeric column.
+    """
+
+    def __init__(self, key_column):
+        self.column_name = key_column.name
+        self.__is_numeric = key_column.is_numeric()
+        (names, codes) = key_column.encoded()
+        rows = np.flatnonzero(codes >= 0)
+        keys = codes[rows]
+
+        counts = np.bincount(keys, minlength=len(names))
+        bounds = np.concatenate([[0], np.cumsum(counts)])
+        sorted_rows = rows[np.argsort(keys, kind="stable")]
+        self.names = [name for (index, name) in enumerate(names) if counts[index] > 0]
+        self.__indexes = {name: sorted_rows[bounds[index]:bounds[index + 1]] for (index, name) in enumerate(names)
+                          if counts[index] > 0}
+
+    def __contains__(self, name):
+        return self.__key(name) in self.__indexes
+
+    def __key(self, name):
+        if self.__is_numeric:
+            try:
+                return str(float(name))
+            except ValueError:
+                pass
+        return str(name)
+
+    def rows_of(self, name):
+        """Return the sorted row indexes of a group, empty if the group doesn't exist."""
+        return self.__indexes.get(self.__key(name), np.empty(0, dtype=np.intp))
+
+    def values_of(self, name, feature_columns, scaled=False, drop_missing=True):
+        """Return a dictionnary of the float64 values of each feature column for the rows of a group. String values
+        are replaced by their code. If drop_missing is True, the rows missing a value in any feature column are
+        dropped, otherwise missing values are nan."""
+        rows = self.rows_of(name)
+
+        if drop_missing:
+            complete_rows = np.ones(rows.shape[0], dtype=bool)
+            for feature_column in feature_columns:
+                complete_rows &= feature_column.mask[rows]
+            rows = rows[complete_rows]
+
+        values = {}
+        for feature_column in feature_columns:
+            if scaled:
+                values[feature_column.name] = feature_column.scaled_values[rows]
+            else:
+                values[feature_column.name] = feature_column.numeric_data(rows)
+
+        return values
@@ -0,0 +1,209 @@
+from . import statistics
+from . import display
+import numpy as np
+
+
+class Imputer:
+
+    """
+    Replaces the missing values of a features x rows matrix by precomputed fill values, in bulk on the nan mask. The
+    fill values are accumulated chunk by chunk, so that an imputer can be fitted on a file that doesn't fit in memory.
+    The sums and counts of the mean strategies are saved with the model, so that its fill values can be updated with
+    new rows.
+
+    Attributes:
+        strategy            "mean" fills with the mean of the feature, "median" with its median, "class_mean" fills the
+                            rows of a known class with the mean of the feature over the rows of this class.
+        feature_names       The names of the imputed features.
+        fill_values         The fill value of each feature, used for the rows without known class.
+        class_names         The classes of the class fill values, with the class_mean strategy.
+        class_fill_values   The features x classes fill values of the rows of each class, with the class_mean strategy.
+        sums                The sum of the values of each feature. None for the models saved without it.
+        counts              The number of values of each feature. None for the models saved without it.
+        class_sums          The features x classes sums of the values of each class, with the class_mean strategy.
+        class_counts        The features x classes numbers of values of each class, with the class_mean strategy.
+    """
+
+    strategies = ["mean", "median", "class_mean"]
+
+    def __init__(self, strategy="mean", feature_names=(), fill_values=None):
+        if strategy not in Imputer.strategies:
+            display.error("Imputation strategy should be one of " + ", ".join(Imputer.strategies) + ".")
+
+        self.strategy = strategy
+        self.feature_names = list(feature_names)
+        self.fill_values = np.zeros(len(self.feature_names)) if fill_values is None else \
+            np.ascontiguousarray(fill_values, dtype=np.float64)
+        self.class_names = []
+        self.class_fill_values = np.zeros((len(self.feature_names), 0))
+        self.sums = np.zeros(len(self.feature_names))
+        self.counts = np.zeros(len(self.feature_names), dtype=np.int64)
+        self.class_sums = np.zeros((len(self.feature_names), 0))
+        self.class_counts = np.zeros((len(self.feature_names), 0), dtype=np.int64)
+        self.__class_indexes = {}
+        self.__sketches = [statistics.QuantileSketch() for _ in self.feature_names] if strategy == "median" else None
+
+        if fill_values is not None:
+            # Fill values given without their statistics can't be updated.
+            (self.sums, self.counts, self.__sketches) = (None, None, None)
+
+    def fit(self, X, feature_names, labels=None):
+        """Compute the fill values of a features x rows matrix X, where nan is a missing value, and of the class label
+        of each row with the class_mean strategy. Returns the imputer."""
+        self.__init__(self.strategy, feature_names)
+        return self.partial_fit(X, labels)
+
+    def partial_fit(self, X, labels=None):
+        """Add the rows of a features x rows matrix X, and their class labels, to the fill values. Returns the
+        imputer."""
+        if not self.can_partial_fit():
+            display.error("The " + self.strategy + " fill values of the model can't be updated with new rows, the " +
+                          "model should be trained again.")
+
+        X = np.asarray(X, dtype=np.float64).reshape(len(self.feature_names), -1)
+        present = ~np.isnan(X)
+        values = np.where(present, X, 0)
+        self.sums += values.sum(axis=1)
+        self.counts += present.sum(axis=1)
+
+        if self.strategy == "median":
+            for (sketch, feature_values, feature_present) in zip(self.__sketches, X, present):
+                sketch.update(feature_values[feature_present])
+        elif self.strategy == "class_mean" and labels is not None:
+            self.__add_class_values(values, present, labels)
+
+        self.__update_fill_values()
+        return self
+
+    def can_partial_fit(self):
+        """Return True if new rows can be added to the fill values. The median sketches aren't saved with the models, and
+        older models don't contain the sums of the means."""
+        if self.strategy == "median":
+            return self.__sketches is not None
+        return self.counts is not None
+
+    def __add_class_values(self, values, present, labels):
+        (chunk_class_names, codes) = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        for class_name in chunk_class_names.tolist():
+            self.__class_indexes.setdefault(class_name, len(self.__class_indexes))
+
+        class_count = len(self.__class_indexes)
+        if class_count > self.class_sums.shape[1]:
+            added = class_count - self.class_sums.shape[1]
+            self.class_sums = np.hstack([self.class_sums, np.zeros((values.shape[0], added))])
+            self.class_counts = np.hstack([self.class_counts, np.zeros((values.shape[0], added), dtype=np.int64)])
+            self.class_names = list(self.__class_indexes.keys())
+
+        # A single bincount sums the values of every feature and class at once.
+        class_indexes = np.array([self.__class_indexes[name] for name in chunk_class_names.tolist()])[codes.reshape(-1)]
+        bins = (np.arange(values.shape[0]).reshape(-1, 1) * class_count + class_indexes).reshape(-1)
+        self.class_sums += np.bincount(bins, weights=values.reshape(-1), minlength=values.shape[0] * class_count) \
+            .reshape(values.shape[0], class_count)
+        self.class_counts += np.bincount(bins, weights=present.reshape(-1), minlength=values.shape[0] * class_count) \
+            .reshape(values.shape[0], class_count).astype(np.int64)
+
+    def __update_fill_values(self):
+        if self.strategy == "median":
+            self.fill_values = np.array([sketch.value_at_rank(statistics.quartile_ranks(sketch.count)[1])
+                                         if sketch.count > 0 else 0.0 for sketch in self.__sketches])
+            return
+
+        self.fill_values = np.where(self.counts > 0, self.sums / np.maximum(self.counts, 1), 0.0)
+        if self.strategy == "class_mean":
+            self.class_fill_values = np.where(self.class_counts > 0,
+                                              self.class_sums / np.maximum(self.class_counts, 1),
+                                              self.fill_values.reshape(-1, 1))
+
+    def transform(self, X, labels=None, copy=True):
+        """Return a features x rows matrix X without missing values. With the class_mean strategy, the rows whose class
+        label is given and known are filled with the mean of their class. X is filled in place if copy is False and it
+        is a float64 array."""
+        X = np.array(X, dtype=np.float64) if copy else np.asarray(X, dtype=np.float64)
+        missing = np.isnan(X)
+        if not missing.any():
+            return X
+
+        fill_values = np.broadcast_to(self.fill_values.reshape(-1, 1), X.shape)
+        if self.strategy == "class_mean" and labels is not None and len(self.class_names) > 0:
+            labels = np.asarray(labels, dtype=str)
+            class_names = np.array(self.class_names, dtype=str)
+            order = np.argsort(class_names)
+            positions = np.minimum(np.searchsorted(class_names[order], labels), order.shape[0] - 1)
+            # The unknown classes take the last column: the fill values of the rows without known class.
+            class_indexes = np.where(class_names[order][positions] == labels, order[positions], -1)
+            class_fill_values = np.hstack([self.class_fill_values, self.fill_values.reshape(-1, 1)])
+            fill_values = class_fill_values[:, class_indexes]
+
+        np.copyto(X, fill_values, where=missing)
+        return X
+
+    def copy(self):
+        """Return a copy of the imputer as it is saved with a model."""
+        return Imputer.from_arrays(self.to_arrays(), self.feature_names)
+
+    def to_dict(self):
+        """Return the imputer as the content of a .mlmodel file. The predicted rows are filled with the fill values of
+        the rows without known class, the class statistics are only kept to update the model."""
+        data = {"strategy": self.strategy, "fill_values": dict(zip(self.feature_names, self.fill_values.tolist()))}
+        if self.counts is not None and self.strategy != "median":
+            data["sums"] = dict(zip(self.feature_names, self.sums.tolist()))
+            data["counts"] = dict(zip(self.feature_names, self.counts.tolist()))
+            if self.strategy == "class_mean":
+                data["class_names"] = self.class_names
+                data["class_sums"] = dict(zip(self.feature_names, self.class_sums.tolist()))
+                data["class_counts"] = dict(zip(self.feature_names, self.class_counts.tolist()))
+        return data
+
+    @staticmethod
+    def from_dict(data, feature_names):
+        """Return the imputer of the content of a .mlmodel file. The sums and counts are missing from older models."""
+        features_imputer = Imputer(data["strategy"], feature_names, [data["fill_values"][name] for name in feature_names])
+        if "counts" not in data:
+            return features_imputer
+
+        if data["strategy"] == "class_mean":
+            features_imputer.__restore([data["sums"][name] for name in feature_names],
+                                       [data["counts"][name] for name in feature_names], data["class_names"],
+                                       [data["class_sums"][name] for name in feature_names],
+                                       [data["class_counts"][name] for name in feature_names])
+        else:
+            features_imputer.__restore([data["sums"][name] for name in feature_names],
+                                       [data["counts"][name] for name in feature_names])
+        return features_imputer
+
+    def to_arrays(self):
+        """Return the imputer as the arrays of a .mlmodel.npz file."""
+        arrays = {"imputation": np.array(self.strategy), "fill_values": self.fill_values}
+        if self.counts is not None and self.strategy != "median":
+            arrays.update({"imputer_sums": self.sums, "imputer_counts": self.counts})
+            if self.strategy == "class_mean":
+                arrays.update({"imputer_class_names": np.array(self.class_names, dtype=str),
+                               "imputer_class_sums": self.class_sums, "imputer_class_counts": self.class_counts})
+        return arrays
+
+    @staticmethod
+    def from_arrays(arrays, feature_names):
+        """Return the imputer of the arrays of a .mlmodel.npz file."""
+        features_imputer = Imputer(str(arrays["imputation"]), feature_names, arrays["fill_values"])
+        if "imputer_counts" not in arrays:
+            return features_imputer
+
+        if "imputer_class_names" in arrays:
+            features_imputer.__restore(arrays["imputer_sums"], arrays["imputer_counts"],
+                                       arrays["imputer_class_names"].tolist(), arrays["imputer_class_sums"],
+                                       arrays["imputer_class_counts"])
+        else:
+            features_imputer.__restore(arrays["imputer_sums"], arrays["imputer_counts"])
+        return features_imputer
+
+    def __restore(self, sums, counts, class_names=(), class_sums=None, class_counts=None):
+        # The sketches of the median aren't saved: its fill values stay the saved ones and can't be updated.
+        self.sums = np.array(sums, dtype=np.float64)
+        self.counts = np.array(counts, dtype=np.int64)
+        self.class_names = list(class_names)
+        self.__class_indexes = {class_name: index for (index, class_name) in enumerate(self.class_names)}
+        if class_sums is not None:
+            self.class_sums = np.array(class_sums, dtype=np.float64).reshape(len(self.feature_names), -1)
+            self.class_counts = np.array(class_counts, dtype=np.int64).reshape(len(self.feature_names), -1)
+        if self.strategy != "median":
+            self.__update_fill_values()
@@ -1,54 +1,380 @@
 import numpy as np
 from . import file_manager
+from . import model
 from . import display
+from . import profiler
+from . import scaler
+from . import imputer
 
 
 
 class LogisticRegression:
 
-    def __init__(self, learning_rate):
+    """
+    A multi-class logistic regression. Every class is trained at once: each iteration updates the whole
+    classes x features thetas matrix with one matrix product.
+
+    Attributes:
+        learning_rate   The gradient descent learning rate.
+        multi_class     "ovr" trains an independent sigmoid per class (one-vs-rest), "softmax" trains a multinomial
+                        model.
+        batch_size      The number of rows of each update. None uses every row (batch gradient descent), 1 is a
+                        stochastic gradient descent.
+        epochs          The maximum number of passes over the rows with mini-batches, or of iterations with the
+                        newton and lbfgs optimizers.
+        shuffle         Shuffle the rows before each pass with mini-batches.
+        optimizer       "gd" for gradient descent, "adam" for an adaptive gradient descent, "newton" for Newton's
+                        method (IRLS), suited to few features, "lbfgs" for a quasi-Newton method suited to many features.
+        row_names       The trained row names of the target column, one per class.
+        thetas          The classes x (1 + features) thetas matrix.
+        thetas_dict     The trained thetas of each class, by feature name.
+        scaler          The StandardScaler of the features, saved with the model.
+        imputer         The Imputer of the missing values of the features, saved with the model.
+        costs           The cost of each class after each iteration of the last training, or the sum of these costs
+                        with the lbfgs optimizer.
+    """
+
+    multi_classes = ["ovr", "softmax"]
+    optimizers = ["gd", "adam", "newton", "lbfgs"]
+    partial_optimizers = ["gd", "adam"]
+    tolerance = 0.00001
+    regularization = 0.000001
+    lbfgs_memory = 10
+    adam_decays = (0.9, 0.999)
+
+    def __init__(self, learning_rate, multi_class="ovr", batch_size=None, epochs=100, shuffle=True, optimizer="gd",
+                 imputation="mean"):
+        if multi_class not in LogisticRegression.multi_classes:
+            display.error("Multi-class objective should be one of " + ", ".join(LogisticRegression.multi_classes) + ".")
+        if optimizer not in LogisticRegression.optimizers:
+            display.error("Optimizer should be one of " + ", ".join(LogisticRegression.optimizers) + ".")
+        if batch_size is not None and batch_size < 1:
+            display.error("Batch size should be greater than 0.")
+        if epochs < 1:
+            display.error("Number of epochs should be greater than 0.")
+
         self.learning_rate = learning_rate
+        self.multi_class = multi_class
+        self.batch_size = batch_size
+        self.epochs = epochs
+        self.shuffle = shuffle
+        self.optimizer = optimizer
+        self.row_names = None
+        self.thetas = None
         self.thetas_dict = {}
-        self.mean = {}
-        self.std = {}
-    
-    def fit(self, X, Y, feature_names):
+        self.scaler = scaler.StandardScaler()
+        self.imputer = imputer.Imputer(imputation)
+        self.costs = []
+        self.__moments = None
+
+    @staticmethod
+    def from_model(trained_model, learning_rate, batch_size=None, epochs=100, shuffle=True, optimizer="gd"):
+        """Return a LogisticRegression starting from the thetas, the feature statistics and the fill values of a
+        compiled Model, to update it with new rows. The median fill values can't be updated."""
+        if trained_model.count is None:
+            display.error("The model doesn't contain the number of rows it was trained on, it should be trained again.")
+        if not trained_model.imputer.can_partial_fit():
+            display.error("The " + trained_model.imputer.strategy + " fill values of the model can't be updated with " +
+                          "new rows, it should be trained again.")
+
+        regression = LogisticRegression(learning_rate, multi_class=trained_model.multi_class, batch_size=batch_size,
+                                        epochs=epochs, shuffle=shuffle, optimizer=optimizer,
+                                        imputation=trained_model.imputer.strategy)
+        regression.row_names = np.array(trained_model.row_names, dtype=str)
+        regression.thetas = np.array(trained_model.thetas, dtype=np.float64)
+        regression.scaler = trained_model.scaler.copy()
+        regression.imputer = trained_model.imputer.copy()
+        regression.__update_thetas_dict(trained_model.feature_names)
+        return regression
+
+    def rescale(self, features_scaler):
+        """Express the thetas in the mean and standard deviation of a new StandardScaler of the same features, without
+        changing the predictions: t0 + t.(x - mean) / std stays the same for every row x."""
+        previous_mean = self.scaler.mean
+        previous_std = self.scaler.std
+
+        self.thetas[:, 0] += (self.thetas[:, 1:] * (features_scaler.mean - previous_mean) / previous_std).sum(axis=1)
+        self.thetas[:, 1:] *= features_scaler.std / previous_std
+        self.scaler = features_scaler
+        self.__update_thetas_dict(features_scaler.feature_names)
+
+    def add_row_names(self, row_names, feature_names):
+        """Add classes with zero thetas for the row names the model was not trained on."""
+        new_row_names = np.setdiff1d(np.asarray(row_names, dtype=str), self.row_names)
+        if new_row_names.shape[0] == 0:
+            return
+
+        row_names = np.concatenate([self.row_names, new_row_names])
+        thetas = np.vstack([self.thetas, np.zeros((new_row_names.shape[0], self.thetas.shape[1]))])
+        order = np.argsort(row_names, kind="stable")
+        self.row_names = row_names[order]
+        self.thetas = thetas[order]
+        self.__moments = None
+        self.__update_thetas_dict(feature_names)
+
+    def fit(self, X, Y, feature_names, row_names=None):
+        """Train the thetas on a features x rows matrix X of scaled values and the row names Y. If the sorted row names
+        are given, Y holds the index of the row name of each row instead."""
+        np.seterr(all='raise')
+        X = np.vstack([np.ones(X.shape[1]), X])
+        if row_names is None:
+            (self.row_names, Y) = np.unique(Y, return_inverse=True)
+        else:
+            self.row_names = np.asarray(row_names, dtype=str)
+        self.thetas = np.zeros((self.row_names.shape[0], X.shape[0]))
+        self.costs = []
+        expected_results = self.__expected_results(Y)
+
+        with profiler.Profiler.stage("LogisticRegression.fit", rows=X.shape[1]) as stage:
+            if self.optimizer == "newton":
+                self.__fit_newton(X, expected_results)
+            elif self.optimizer == "lbfgs":
+                self.__fit_lbfgs(X, expected_results)
+            elif self.batch_size is None and self.optimizer == "gd":
+                self.__fit_batch(X, expected_results)
+            else:
+                self.__fit_mini_batches(X, expected_results)
+            stage.iterations += len(self.costs)
+            stage.costs = self.costs
+
+        self.__update_thetas_dict(feature_names)
+
+    def partial_fit(self, X, Y, row_names, feature_names):
+        """Run one pass of mini-batch updates over a chunk of rows, keeping the thetas between calls. All the row
+        names of the target column must be given, as a chunk may not contain every one of them. The newton and lbfgs
+        optimizers need every row at once and can't be used. Returns the mean cost of each class over the chunk."""
+        if self.optimizer not in LogisticRegression.partial_optimizers:
+            display.error("The " + self.optimizer + " optimizer needs every row at once. Use one of " +
+                          ", ".join(LogisticRegression.partial_optimizers) + " to train by chunks or update a model.")
+
         np.seterr(all='raise')
         X = np.vstack([np.ones(X.shape[1]), X])
-        thetas = np.zeros((np.unique(Y).shape[0], X.shape[0]))
-        m = np.shape(Y)[0]
-        linear_matrix = np.ones(m)
-
-        for index, row_name in enumerate(np.unique(Y)):
-            expected_results = np.where(Y == row_name, 1, 0)
-            row_theta = thetas[index]
-            prev_cost = -100
-            cost = 0
-            while abs(cost - prev_cost) > 0.00001:
-                x = LogisticRegression.__g(row_theta.dot(X))
-                x[x == 1] = 0.999
-                prev_cost = cost
-                cost = np.log(x) * expected_results + (1 - expected_results) * np.log(1 - x)
-                cost = cost.dot(linear_matrix) / -m
-                error = x - expected_results
-                gradient = error * X
-                new_thetas = linear_matrix.dot(gradient.T)
-                new_thetas = new_thetas * self.learning_rate / m
-                thetas[index] -= new_thetas
-
-        for row_index, row_name in enumerate(np.unique(Y)):
+
+        if self.thetas is None:
+            self.row_names = np.unique(np.asarray(row_names).astype(str))
+            self.thetas = np.zeros((self.row_names.shape[0], X.shape[0]))
+
+        training = np.ones(self.row_names.shape[0], dtype=bool)
+        with profiler.Profiler.stage("LogisticRegression.partial_fit", rows=X.shape[1]) as stage:
+            costs = self.__run_epoch(X, self.__expected_results(Y), training)
+            stage.iterations += 1
+        self.__update_thetas_dict(feature_names)
+        return costs
+
+    def __expected_results(self, Y):
+        """Return the classes x rows one-hot matrix of Y, row names or their index in the row names."""
+        Y = np.asarray(Y).reshape(-1)
+        if not np.issubdtype(Y.dtype, np.integer):
+            Y = np.searchsorted(self.row_names, Y)
+        return np.where(Y == np.arange(self.row_names.shape[0]).reshape(-1, 1), 1, 0)
+
+    def __fit_batch(self, X, expected_results):
+        prev_costs = np.full(self.row_names.shape[0], -100.0)
+        costs = np.zeros(self.row_names.shape[0])
+        training = np.ones(self.row_names.shape[0], dtype=bool)
+
+        while training.any():
+            prev_costs[training] = costs[training]
+            costs[training] = self.__step(X, expected_results, training)
+            self.__update_training(training, costs, prev_costs)
+
+    def __fit_mini_batches(self, X, expected_results):
+        prev_costs = np.full(self.row_names.shape[0], -100.0)
+        costs = np.zeros(self.row_names.shape[0])
+        training = np.ones(self.row_names.shape[0], dtype=bool)
+
+        for _ in range(self.epochs):
+            prev_costs[training] = costs[training]
+            costs[training] = self.__run_epoch(X, expected_results, training)
+            self.__update_training(training, costs, prev_costs)
+            if not training.any():
+                break
+
+    def __run_epoch(self, X, expected_results, training):
+        """Update the thetas of the training classes batch by batch. Returns their mean cost over the pass."""
+        m = X.shape[1]
+        batch_size = m if self.batch_size is None else self.batch_size
+        order = np.random.permutation(m) if self.shuffle else np.arange(m)
+        costs = np.zeros(int(training.sum()))
+
+        for start in range(0, m, batch_size):
+            rows = order[start:start + batch_size]
+            costs += self.__step(X[:, rows], expected_results[:, rows], training) * rows.shape[0]
+
+        return costs / m
+
+    def __step(self, X, expected_results, training):
+        """Run one gradient descent or adam update of the thetas of the training classes on the rows of X. Returns the
+        cost of these classes before the update."""
+        if self.multi_class == "softmax":
+            training = np.ones(training.shape[0], dtype=bool)
+
+        costs, gradients, _ = self.__costs_and_gradients(self.thetas[training], X, expected_results[training])
+
+        if self.optimizer != "adam":
+            self.thetas[training] -= gradients * self.learning_rate
+            return costs
+
+        if self.__moments is None:
+            self.__moments = [np.zeros(self.thetas.shape), np.zeros(self.thetas.shape), np.zeros(self.thetas.shape[0])]
+        (first_moments, second_moments, steps) = self.__moments
+        (first_decay, second_decay) = LogisticRegression.adam_decays
+
+        steps[training] += 1
+        first_moments[training] = first_decay * first_moments[training] + (1 - first_decay) * gradients
+        second_moments[training] = second_decay * second_moments[training] + (1 - second_decay) * gradients ** 2
+        first_estimates = first_moments[training] / (1 - first_decay ** steps[training]).reshape(-1, 1)
+        second_estimates = second_moments[training] / (1 - second_decay ** steps[training]).reshape(-1, 1)
+        self.thetas[training] -= self.learning_rate * first_estimates / (np.sqrt(second_estimates) + 1e-8)
+        return costs
+
+    def __costs_and_gradients(self, thetas, X, expected_results):
+        """Return the cost, the gradient and the probabilities of each class of thetas on the rows of X."""
+        m = X.shape[1]
+
+        if self.multi_class == "softmax":
+            x = LogisticRegression.__softmax(thetas.dot(X))
+            costs = -(np.log(np.clip(x, 1e-15, None)) * expected_results).sum(axis=1) / m
+        elif self.optimizer == "gd":
+            x = LogisticRegression.__g(thetas.dot(X))
+            x[x == 1] = 0.999
+            costs = -(np.log(x) * expected_results + (1 - expected_results) * np.log(1 - x)).sum(axis=1) / m
+        else:
+            # Second order and adaptive steps can be large: the probabilities are allowed to saturate.
+            with np.errstate(over="ignore", under="ignore"):
+                x = 1 / (1 + np.exp(-thetas.dot(X)))
+            clipped_x = np.clip(x, 1e-15, 1 - 1e-15)
+            costs = -(np.log(clipped_x) * expected_results + (1 - expected_results) * np.log(1 - clipped_x)).sum(axis=1) / m
+
+        return costs, (x - expected_results).dot(X.T) / m, x
+
+    def __fit_newton(self, X, expected_results):
+        prev_costs = np.full(self.row_names.shape[0], -100.0)
+        costs = np.zeros(self.row_names.shape[0])
+        training = np.ones(self.row_names.shape[0], dtype=bool)
+        (k, n) = self.thetas.shape
+
+        for _ in range(self.epochs):
+            prev_costs[training] = costs[training]
+            costs[:], gradients, x = self.__costs_and_gradients(self.thetas, X, expected_results)
+
+            if self.multi_class == "softmax":
+                # The multinomial hessian couples the classes: H[a, b] = X diag(p_a (d_ab - p_b)) X.T / m
+                hessian = np.empty((k, n, k, n))
+                for a in range(k):
+                    for b in range(k):
+                        weights = x[a] * ((1 if a == b else 0) - x[b])
+                        hessian[a, :, b, :] = (X * weights).dot(X.T) / X.shape[1]
+                hessian = hessian.reshape(k * n, k * n) + LogisticRegression.regularization * np.eye(k * n)
+                self.thetas -= np.linalg.solve(hessian, gradients.reshape(-1)).reshape(k, n)
+            else:
+                for row_index in np.flatnonzero(training):
+                    weights = x[row_index] * (1 - x[row_index])
+                    hessian = (X * weights).dot(X.T) / X.shape[1] + LogisticRegression.regularization * np.eye(n)
+                    self.thetas[row_index] -= np.linalg.solve(hessian, gradients[row_index])
+
+            self.__update_training(training, costs, prev_costs)
+            if not training.any():
+                break
+
+    def __fit_lbfgs(self, X, expected_results):
+        shape = self.thetas.shape
+
+        def objective(flat_thetas):
+            costs, gradients, _ = self.__costs_and_gradients(flat_thetas.reshape(shape), X, expected_results)
+            return costs.sum(), gradients.reshape(-1)
+
+        flat_thetas = self.thetas.reshape(-1).copy()
+        cost, gradient = objective(flat_thetas)
+        steps = []
+        gradient_changes = []
+
+        for _ in range(self.epochs):
+            direction = -LogisticRegression.__lbfgs_direction(gradient, steps, gradient_changes)
+            step_size = 1.0
+
+            # Backtracking line search until the Armijo condition holds.
+            while True:
+                new_cost, new_gradient = objective(flat_thetas + step_size * direction)
+                if new_cost <= cost + 0.0001 * step_size * gradient.dot(direction) or step_size < 1e-10:
+                    break
+                step_size /= 2
+
+            step = step_size * direction
+            gradient_change = new_gradient - gradient
+            if step.dot(gradient_change) > 1e-10:
+                steps.append(step)
+                gradient_changes.append(gradient_change)
+                if len(steps) > LogisticRegression.lbfgs_memory:
+                    steps.pop(0)
+                    gradient_changes.pop(0)
+
+            flat_thetas += step
+            converged = abs(cost - new_cost) <= LogisticRegression.tolerance
+            self.costs.append([float(new_cost)])
+            cost, gradient = new_cost, new_gradient
+            if converged:
+                break
+
+        self.thetas = flat_thetas.reshape(shape)
+
+    @staticmethod
+    def __lbfgs_direction(gradient, steps, gradient_changes):
+        """Return the product of the inverse hessian approximation and the gradient (two-loop recursion)."""
+        direction = gradient.copy()
+        alphas = []
+
+        for (step, gradient_change) in reversed(list(zip(steps, gradient_changes))):
+            alpha = step.dot(direction) / gradient_change.dot(step)
+            direction -= alpha * gradient_change
+            alphas.append(alpha)
+
+        if len(steps) > 0:
+            direction *= steps[-1].dot(gradient_changes[-1]) / gradient_changes[-1].dot(gradient_changes[-1])
+
+        for ((step, gradient_change), alpha) in zip(zip(steps, gradient_changes), reversed(alphas)):
+            beta = gradient_change.dot(direction) / gradient_change.dot(step)
+            direction += step * (alpha - beta)
+
+        return direction
+
+    def __update_training(self, training, costs, prev_costs):
+        # One-vs-rest classes stop independently once their cost converges, softmax classes are coupled and stop
+        # together.
+        self.costs.append(costs.tolist())
+        converging = np.abs(costs - prev_costs) > LogisticRegression.tolerance
+        if self.multi_class == "softmax":
+            training[:] = converging.any()
+        else:
+            training &= converging
+
+    def __update_thetas_dict(self, feature_names):
+        self.thetas_dict = {}
+        for row_index, row_name in enumerate(self.row_names):
             self.thetas_dict[row_name] = dict()
-            self.thetas_dict[row_name]["t0"] = thetas[row_index][0]
+            self.thetas_dict[row_name]["t0"] = float(self.thetas[row_index][0])
             for feature_index, feature in enumerate(feature_names):
-                self.thetas_dict[row_name][feature] = float(thetas[row_index][feature_index + 1])
+                self.thetas_dict[row_name][feature] = float(self.thetas[row_index][feature_index + 1])
 
-    def save(self, file_name):
-        file_manager.save_model_data({**{"attributes": {"mean": self.mean, "std": self.std}}, **{"rows": self.thetas_dict}}, file_name)
+    def save(self, file_name, binary=True):
+        """Save the model as a .mlmodel file and, if binary is True, its compiled arrays as a .mlmodel.npz file."""
+        data = {**{"attributes": self.scaler.to_dict()}, **{"rows": self.thetas_dict}, "multi_class": self.multi_class,
+                "imputer": self.imputer.to_dict()}
+        file_manager.save_model_data(data, file_name)
+        if binary:
+            model.Model.from_dict(data).save_binary(file_name)
 
     @staticmethod
     def predict(x):
         return LogisticRegression.__g(x)
 
+    @staticmethod
+    def probabilities(X, thetas):
+        """Return the rows x classes probabilities of a rows x features matrix, for a classes x (1 + features) thetas
+        matrix whose first column holds the intercepts."""
+        with np.errstate(over="ignore"):
+            return 1 / (1 + np.exp(-(X.dot(thetas[:, 1:].T) + thetas[:, 0])))
+
     def __length(self, data, feature_column_names):
         length = {}
 
@@ -60,6 +386,17 @@ class LogisticRegression:
 
         return length
 
+    @staticmethod
+    def softmax_probabilities(X, thetas):
+        """Return the rows x classes probabilities of a rows x features matrix for a multinomial thetas matrix."""
+        return LogisticRegression.__softmax(X.dot(thetas[:, 1:].T) + thetas[:, 0], axis=1)
+
+    @staticmethod
+    def __softmax(z, axis=0):
+        with np.errstate(under="ignore"):
+            exponentials = np.exp(z - z.max(axis=axis, keepdims=True))
+        return exponentials / exponentials.sum(axis=axis, keepdims=True)
+
     @staticmethod
     def __g(z):
         try:
@@ -0,0 +1,205 @@
+from . import file_manager
+from . import logistic_regression
+from . import display
+from . import profiler
+from . import scaler
+from . import imputer
+from collections import OrderedDict
+import numpy as np
+import threading
+import os
+
+
+class Model:
+
+    """
+    A trained .mlmodel compiled into contiguous arrays, with a fixed feature order.
+
+    Attributes:
+        row_names       The row names of the target column, one per class.
+        feature_names   The feature column names, in the order of the thetas columns.
+        thetas          The classes x (1 + features) thetas matrix. The first column holds the intercepts.
+        scaler          The StandardScaler of the features. Its count is None for the models saved without it.
+        multi_class     The LogisticRegression multi-class objective the model was trained with.
+        imputer         The Imputer of the missing values. The models saved without it are imputed with the mean.
+    """
+
+    __cache = OrderedDict()
+    __cache_lock = threading.Lock()
+    cache_size = 8
+
+    def __init__(self, row_names, feature_names, thetas, mean, std, multi_class="ovr", count=None, features_imputer=None,
+                 value_count=None):
+        self.row_names = list(row_names)
+        self.feature_names = list(feature_names)
+        self.thetas = np.ascontiguousarray(thetas, dtype=np.float64)
+        self.scaler = scaler.StandardScaler(self.feature_names, mean, std, count, value_count)
+        self.multi_class = multi_class
+        self.imputer = imputer.Imputer("mean", self.feature_names, self.scaler.mean) if features_imputer is None \
+            else features_imputer
+        # The missing values are filled after the scaling of the rows to predict.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            self.__scaled_fill_values = self.scaler.transform(self.imputer.fill_values.reshape(-1, 1)).reshape(-1)
+
+    @property
+    def mean(self):
+        return self.scaler.mean
+
+    @property
+    def std(self):
+        return self.scaler.std
+
+    @property
+    def count(self):
+        return self.scaler.count
+
+    @staticmethod
+    def from_dict(data):
+        """Compile the content of a .mlmodel file."""
+        row_names = list(data["rows"].keys())
+        if len(row_names) == 0:
+            display.error("The model doesn't contain any row.")
+
+        feature_names = [name for name in data["rows"][row_names[0]].keys() if name != "t0"]
+        thetas = [[data["rows"][row_name][name] for name in ["t0"] + feature_names] for row_name in row_names]
+        features_scaler = scaler.StandardScaler.from_dict(data["attributes"], feature_names)
+        features_imputer = imputer.Imputer.from_dict(data["imputer"], feature_names) if "imputer" in data else None
+
+        return Model(row_names, feature_names, thetas, features_scaler.mean, features_scaler.std,
+                     data.get("multi_class", "ovr"), features_scaler.count, features_imputer, features_scaler.value_count)
+
+    def to_dict(self):
+        """Return the content of the .mlmodel file of the model."""
+        rows = {}
+        for (row_index, row_name) in enumerate(self.row_names):
+            rows[row_name] = {"t0": float(self.thetas[row_index][0])}
+            for (feature_index, feature_name) in enumerate(self.feature_names):
+                rows[row_name][feature_name] = float(self.thetas[row_index][feature_index + 1])
+
+        return {
+            "attributes": self.scaler.to_dict(),
+            "rows": rows,
+            "multi_class": self.multi_class,
+            "imputer": self.imputer.to_dict()
+        }
+
+    @staticmethod
+    def load(file_name):
+        """Load a .mlmodel file, from its binary version if it is up to date. Compiled models are cached by file name
+        and modification time, so loading the same model again doesn't read it."""
+        binary_file_name = file_name + ".npz"
+        use_binary = os.path.exists(binary_file_name) and \
+            (not os.path.exists(file_name) or os.path.getmtime(binary_file_name) >= os.path.getmtime(file_name))
+        source_file_name = binary_file_name if use_binary else file_name
+
+        try:
+            key = (os.path.abspath(source_file_name), os.stat(source_file_name).st_mtime_ns)
+        except OSError:
+            display.error("No such file named " + file_name)
+
+        with Model.__cache_lock:
+            model = Model.__cache.get(key)
+            if model is not None:
+                Model.__cache.move_to_end(key)
+                return model
+
+        if use_binary:
+            arrays = file_manager.get_model_binary(binary_file_name)
+            feature_names = arrays["feature_names"].tolist()
+            features_imputer = imputer.Imputer.from_arrays(arrays, feature_names) if "fill_values" in arrays else None
+            model = Model(arrays["row_names"].tolist(), feature_names, arrays["thetas"], arrays["mean"], arrays["std"],
+                          str(arrays.get("multi_class", "ovr")), arrays.get("count"), features_imputer,
+                          arrays.get("value_count"))
+        else:
+            model = Model.from_dict(file_manager.get_model_data(file_name))
+
+        with Model.__cache_lock:
+            Model.__cache[key] = model
+            if len(Model.__cache) > Model.cache_size:
+                Model.__cache.popitem(last=False)
+
+        return model
+
+    def save_binary(self, file_name):
+        """Save the model arrays next to its .mlmodel file."""
+        arrays = {
+            "row_names": np.array(self.row_names, dtype=str),
+            "feature_names": np.array(self.feature_names, dtype=str),
+            "thetas": self.thetas,
+            "mean": self.mean,
+            "std": self.std,
+            "multi_class": np.array(self.multi_class),
+            **self.imputer.to_arrays()
+        }
+        if self.count is not None:
+            arrays["count"] = self.count
+            arrays["value_count"] = self.scaler.value_count
+
+        file_manager.save_model_binary(arrays, file_name)
+
+    def has_feature(self, feature_name):
+        return self.scaler.has_feature(feature_name)
+
+    def probabilities(self, X):
+        """Return the rows x classes probabilities of a rows x features matrix of scaled values."""
+        if self.multi_class == "softmax":
+            return logistic_regression.LogisticRegression.softmax_probabilities(X, self.thetas)
+        return logistic_regression.LogisticRegression.probabilities(X, self.thetas)
+
+    def predict(self, X, batch_size=file_manager.DEFAULT_CHUNK_SIZE):
+        """Return the most probable row name for each row of X, a rows x features matrix of scaled values. Missing
+        values are replaced by the scaled fill values of the imputer. Rows are scored by batches of batch_size rows."""
+        return np.array(self.row_names, dtype=object)[self.predict_indexes(X, batch_size)]
+
+    def predict_indexes(self, X, batch_size=file_manager.DEFAULT_CHUNK_SIZE):
+        """Return the index in row_names of the most probable row name for each row of X, as predict."""
+        predicted_indexes = np.empty(X.shape[0], dtype=np.intp)
+
+        for (start, probabilities) in self.__batch_probabilities(X, batch_size):
+            predicted_indexes[start:start + probabilities.shape[0]] = np.argmax(probabilities, axis=1)
+
+        return predicted_indexes
+
+    def predict_probabilities(self, X, batch_size=file_manager.DEFAULT_CHUNK_SIZE):
+        """Return the rows x classes probabilities of the row names for each row of X, as predict. The one-vs-rest
+        sigmoids of a row are divided by their sum, so that the probabilities of every row sum to 1 whatever the
+        multi-class objective. The most probable row name stays the same."""
+        row_probabilities = np.empty((X.shape[0], len(self.row_names)))
+
+        for (start, probabilities) in self.__batch_probabilities(X, batch_size):
+            row_probabilities[start:start + probabilities.shape[0]] = probabilities
+
+        if self.multi_class != "softmax":
+            sums = row_probabilities.sum(axis=1, keepdims=True)
+            np.divide(row_probabilities, sums, out=row_probabilities, where=sums > 0)
+        return row_probabilities
+
+    def __batch_probabilities(self, X, batch_size):
+        with profiler.Profiler.stage("Model.predict", rows=X.shape[0]):
+            for start in range(0, X.shape[0], batch_size):
+                batch = np.array(X[start:start + batch_size], dtype=np.float64)
+                np.copyto(batch, self.__scaled_fill_values, where=np.isnan(batch))
+                yield start, self.probabilities(batch)
+
+    def probability_columns(self, probabilities, all_classes=True, top_k=None):
+        """Return the csv columns of the rows x classes probabilities of predict_probabilities, by column name: the
+        probability of each row name if all_classes is True, then the top_k most probable row names of each row with
+        their probability if top_k is given."""
+        columns = {}
+        if all_classes:
+            for (index, row_name) in enumerate(self.row_names):
+                columns[row_name + " probability"] = probabilities[:, index]
+
+        if top_k is not None:
+            top_k = min(top_k, len(self.row_names))
+            # A partition finds the top_k classes of every row at once, only these classes are sorted.
+            top_indexes = np.argpartition(-probabilities, top_k - 1, axis=1)[:, :top_k]
+            order = np.argsort(-np.take_along_axis(probabilities, top_indexes, axis=1), axis=1, kind="stable")
+            top_indexes = np.take_along_axis(top_indexes, order, axis=1)
+            top_probabilities = np.take_along_axis(probabilities, top_indexes, axis=1)
+            row_names = np.array(self.row_names, dtype=object)
+            for rank in range(top_k):
+                columns["Top " + str(rank + 1)] = row_names[top_indexes[:, rank]]
+                columns["Top " + str(rank + 1) + " probability"] = top_probabilities[:, rank]
+
+        return columns
@@ -0,0 +1,149 @@
+from . import display
+from . import command_line
+import contextlib
+import functools
+import tracemalloc
+import atexit
+import time
+import json
+
+
+class Stage:
+
+    """
+    The measures of every call of an instrumented stage.
+
+    Attributes:
+        name        The name of the stage.
+        calls       The number of calls of the stage.
+        seconds     The wall time spent in the stage.
+        rows        The number of rows processed by the stage.
+        iterations  The number of iterations of the stage, until the convergence of a training.
+        costs       The cost of each class after each iteration of the last training.
+        allocated   The peak memory allocated by a call of the stage, in bytes.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.iterations = 0
+        self.costs = []
+        self.allocated = 0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else None
+
+    def to_dict(self):
+        return {"name": self.name, "calls": self.calls, "seconds": self.seconds, "rows": self.rows,
+                "rows_per_second": self.rows_per_second, "iterations": self.iterations, "costs": self.costs,
+                "allocated": self.allocated}
+
+
+class Profiler:
+
+    """
+    An opt-in instrumentation of the stages of a run. Disabled, a stage only costs a function call. Enabled, every
+    allocation is traced, which slows down the run: the measured times are meant to be compared between stages.
+
+    Attributes:
+        enabled             True if the stages are measured.
+        trace_file_name     The file name of the JSON trace written at the end of the run. The summary is displayed
+                            instead if it is None.
+    """
+
+    enabled = False
+    trace_file_name = None
+    __stages = {}
+    __running = []
+
+    @staticmethod
+    def register_flag():
+        """Register the -P flag turning profiling on for a script."""
+        command_line.CommandLine.register_flag("P", description="Profile the run: display the time, rows per second and memory of each stage, or save them as a JSON trace in the given file name.",
+                                               require_parameters=False)
+
+    @staticmethod
+    def enable_if_needed():
+        """Enable profiling if the -P flag is given."""
+        value = command_line.CommandLine.get_value_for_flag("P")
+        if value:
+            Profiler.enable(None if value is True else value)
+
+    @staticmethod
+    def enable(trace_file_name=None):
+        """Measure the stages of the run, and report them when the run ends."""
+        if not Profiler.enabled:
+            tracemalloc.start()
+            atexit.register(Profiler.report)
+        Profiler.enabled = True
+        Profiler.trace_file_name = trace_file_name
+
+    @staticmethod
+    @contextlib.contextmanager
+    def stage(name, rows=0):
+        """Measure a block of code as a call of the stage name. The Stage is yielded to add the rows, iterations and
+        costs known inside the block."""
+        if not Profiler.enabled:
+            yield Stage(name)
+            return
+
+        stage = Profiler.__stages.setdefault(name, Stage(name))
+        stage.calls += 1
+        stage.rows += rows
+        # The peak of an enclosing stage is saved before measuring the peak of this one.
+        Profiler.__running.append([tracemalloc.get_traced_memory()[0], 0])
+        peaks = Profiler.__running
+        if len(peaks) > 1:
+            peaks[-2][1] = max(peaks[-2][1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+
+        try:
+            yield stage
+        finally:
+            stage.seconds += time.perf_counter() - start
+            (start_memory, peak) = peaks.pop()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            stage.allocated = max(stage.allocated, peak - start_memory)
+            if len(peaks) > 0:
+                peaks[-1][1] = max(peaks[-1][1], peak)
+
+    @staticmethod
+    def profiled(name):
+        """Decorate a function to measure each of its calls as a call of the stage name."""
+        def decorator(function):
+            @functools.wraps(function)
+            def profiled_function(*args, **kwargs):
+                with Profiler.stage(name):
+                    return function(*args, **kwargs)
+            return profiled_function
+        return decorator
+
+    @staticmethod
+    def stages():
+        return list(Profiler.__stages.values())
+
+    @staticmethod
+    def report():
+        """Display the summary of the stages, or save it as a JSON trace."""
+        if Profiler.trace_file_name is not None:
+            with open(Profiler.trace_file_name, "w") as trace_file:
+                json.dump({"stages": [stage.to_dict() for stage in Profiler.stages()]}, trace_file, indent=4)
+            display.success("Saved profiling trace in " + Profiler.trace_file_name)
+            return
+
+        column_size = 14
+        headers = ["calls", "seconds", "rows/s", "iterations", "alloc MiB"]
+        print("")
+        print(display.sized_str("", 40) + "".join(display.attributed_str(display.sized_str(header, column_size),
+                                                                         [display.Color.blue]) for header in headers))
+        for stage in Profiler.stages():
+            values = [str(stage.calls), "%.4f" % stage.seconds,
+                      "-" if stage.rows_per_second is None or stage.rows == 0 else "%.0f" % stage.rows_per_second,
+                      str(stage.iterations) if stage.iterations > 0 else "-", "%.2f" % (stage.allocated / 1024 ** 2)]
+            print(display.attributed_str(display.sized_str(stage.name, 40), [display.Style.bold]) +
+                  "".join(display.sized_str(value, column_size) for value in values))
+        print("")
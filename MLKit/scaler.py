@@ -0,0 +1,117 @@
+from . import display
+import numpy as np
+
+
+class StandardScaler:
+
+    """
+    Scales features to a zero mean and a unit standard deviation. Missing values count as rows at the mean: they add
+    rows without adding any deviation. The statistics are merged chunk by chunk (Chan et al.), so a scaler can be fitted
+    on a file that doesn't fit in memory, or updated with new rows.
+
+    Attributes:
+        feature_names   The names of the scaled features.
+        mean            The float64 mean of each feature.
+        std             The float64 standard deviation of each feature.
+        count           The number of rows the statistics were computed on.
+        value_count     The number of values the mean of each feature was computed on, the missing values excluded.
+                        The models saved without it use the count.
+    """
+
+    def __init__(self, feature_names=(), mean=None, std=None, count=None, value_count=None):
+        self.feature_names = list(feature_names)
+        if mean is None:
+            # A scaler without statistics is fitted on zero rows.
+            (mean, std, count, value_count) = ([0.0] * len(self.feature_names), [0.0] * len(self.feature_names),
+                                               [0] * len(self.feature_names), [0] * len(self.feature_names))
+
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.std = np.ascontiguousarray(std, dtype=np.float64)
+        self.count = None if count is None else np.ascontiguousarray(count, dtype=np.int64)
+        if value_count is None:
+            value_count = count
+        self.value_count = None if value_count is None else np.ascontiguousarray(value_count, dtype=np.int64)
+        self.__feature_indexes = {name: index for (index, name) in enumerate(self.feature_names)}
+
+    def fit(self, X, feature_names):
+        """Compute the statistics of a features x rows matrix X, where nan is a missing value. Returns the scaler."""
+        self.__init__(feature_names)
+        return self.partial_fit(X)
+
+    def partial_fit(self, X):
+        """Add the rows of a features x rows matrix X to the statistics. Returns the scaler."""
+        if self.count is None:
+            display.error("The scaler doesn't contain the number of rows it was fitted on.")
+
+        X = np.asarray(X, dtype=np.float64).reshape(len(self.feature_names), -1)
+        present = ~np.isnan(X)
+        value_count = present.sum(axis=1)
+        mean = np.where(present, X, 0).sum(axis=1) / np.maximum(value_count, 1)
+        m2 = (np.where(present, X - mean.reshape(-1, 1), 0) ** 2).sum(axis=1)
+        self.merge(X.shape[1], value_count, mean, m2)
+        return self
+
+    def merge(self, count, value_count, mean, m2):
+        """Add the statistics of count rows, value_count of them having a value with this mean and sum of squared
+        differences to the mean m2."""
+        previous_m2 = self.std ** 2 * self.count
+        total_value_count = self.value_count + value_count
+        weights = value_count / np.maximum(total_value_count, 1)
+        delta = mean - self.mean
+
+        self.mean = np.where(self.value_count == 0, mean, self.mean + delta * weights)
+        m2 = previous_m2 + m2 + delta ** 2 * self.value_count * weights
+        self.count = self.count + count
+        self.value_count = total_value_count
+        self.std = np.sqrt(m2 / np.maximum(self.count, 1))
+
+    def copy(self):
+        return StandardScaler(self.feature_names, self.mean.copy(), self.std.copy(),
+                              None if self.count is None else self.count.copy(),
+                              None if self.value_count is None else self.value_count.copy())
+
+    def has_feature(self, feature_name):
+        return feature_name in self.__feature_indexes
+
+    def mean_of(self, feature_name):
+        return self.mean[self.__feature_indexes[feature_name]]
+
+    def std_of(self, feature_name):
+        return self.std[self.__feature_indexes[feature_name]]
+
+    def transform(self, X, copy=True):
+        """Return the scaled values of a features x rows matrix X. X is scaled in place if copy is False and it is a
+        float64 array."""
+        X = np.array(X, dtype=np.float64) if copy else np.asarray(X, dtype=np.float64)
+        X -= self.mean.reshape(-1, 1)
+        X /= self.std.reshape(-1, 1)
+        return X
+
+    def transform_values(self, feature_name, values):
+        """Return the scaled values of a single feature."""
+        return (np.asarray(values, dtype=np.float64) - self.mean_of(feature_name)) / self.std_of(feature_name)
+
+    def to_dict(self):
+        """Return the scaler as the attributes of a .mlmodel file."""
+        data = {"mean": dict(zip(self.feature_names, self.mean.tolist())),
+                "std": dict(zip(self.feature_names, self.std.tolist()))}
+        if self.count is not None:
+            data["count"] = dict(zip(self.feature_names, self.count.tolist()))
+            data["value_count"] = dict(zip(self.feature_names, self.value_count.tolist()))
+        return data
+
+    @staticmethod
+    def from_dict(data, feature_names):
+        """Return the scaler of the attributes of a .mlmodel file. The counts are missing from older models."""
+        mean = [data["mean"][name] for name in feature_names]
+        std = [data["std"][name] for name in feature_names]
+        (count, value_count) = (StandardScaler.__counts_of(data.get("count"), feature_names),
+                                StandardScaler.__counts_of(data.get("value_count"), feature_names))
+
+        return StandardScaler(feature_names, mean, std, count, None if count is None else value_count)
+
+    @staticmethod
+    def __counts_of(counts, feature_names):
+        if counts is None or not all(name in counts for name in feature_names):
+            return None
+        return [counts[name] for name in feature_names]
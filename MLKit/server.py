@@ -0,0 +1,256 @@
+from . import column
+from . import file_manager
+from . import model
+from http import server as http_server
+from urllib import parse
+import numpy as np
+import socketserver
+import threading
+import queue
+import time
+import json
+import csv
+import io
+import os
+
+
+class PredictionBatcher:
+
+    """
+    Scores the rows sent concurrently to the server in vectorized batches. A single thread takes the pending requests,
+    waits up to max_wait seconds for other requests to fill a batch of max_rows rows, then runs one prediction per
+    model for the whole batch.
+
+    Attributes:
+        max_rows    The number of rows after which a batch is scored without waiting.
+        max_wait    The number of seconds the first request of a batch waits for other requests.
+    """
+
+    class Request:
+
+        def __init__(self, trained_model, X):
+            self.trained_model = trained_model
+            self.X = X
+            self.predicted_values = None
+            self.error = None
+            self.done = threading.Event()
+
+    def __init__(self, max_rows=file_manager.DEFAULT_CHUNK_SIZE, max_wait=0.002):
+        self.max_rows = max_rows
+        self.max_wait = max_wait
+        self.__queue = queue.Queue()
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def predict(self, trained_model, X):
+        """Return the predicted row names of a rows x features matrix of scaled values, once its batch is scored."""
+        request = PredictionBatcher.Request(trained_model, X)
+        self.__queue.put(request)
+        request.done.wait()
+
+        if request.error is not None:
+            raise request.error
+        return request.predicted_values
+
+    def __run(self):
+        while True:
+            batch = [self.__queue.get()]
+            row_count = batch[0].X.shape[0]
+            deadline = time.monotonic() + self.max_wait
+
+            while row_count < self.max_rows:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.__queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+                row_count += batch[-1].X.shape[0]
+
+            self.__score(batch)
+
+    @staticmethod
+    def __score(batch):
+        models = {}
+        for request in batch:
+            models.setdefault(id(request.trained_model), []).append(request)
+
+        for requests in models.values():
+            try:
+                X = np.concatenate([request.X for request in requests])
+                predicted_values = requests[0].trained_model.predict(X)
+                bounds = np.cumsum([0] + [request.X.shape[0] for request in requests])
+                for (index, request) in enumerate(requests):
+                    request.predicted_values = predicted_values[bounds[index]:bounds[index + 1]]
+            except Exception as error:
+                for request in requests:
+                    request.error = error
+
+            for request in requests:
+                request.done.set()
+
+
+class PredictionError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class PredictionRequestHandler(http_server.BaseHTTPRequestHandler):
+
+    """
+    Scores the rows of a POST /predict request. A JSON body holds the model file name and the rows, as objects by
+    feature name or as lists in the order of the model features:
+
+        {"model": "train.mlmodel", "rows": [{"Astronomy": -487.8, "Herbology": 5.7, "Ancient Runes": 367.5}]}
+
+    and gets {"predictions": [...]} back. A csv body gets a csv file of the predicted values back, as
+    log_reg_predict.py saves it. The model and the predicted column name are then read from the model and target
+    query parameters.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        url = parse.urlparse(self.path)
+        if url.path != "/predict":
+            self.__send(404, "application/json", json.dumps({"error": "Unknown path " + url.path}))
+            return
+
+        try:
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8")
+            query = parse.parse_qs(url.query)
+
+            if self.headers.get("Content-Type", "").startswith("text/csv"):
+                response = (200, "text/csv", self.__predict_csv(body, query))
+            else:
+                response = (200, "application/json", self.__predict_json(body, query))
+        except PredictionError as error:
+            response = (error.status, "application/json", json.dumps({"error": str(error)}))
+        except Exception as error:
+            # The client gets an answer instead of a closed connection, and the server keeps running.
+            response = (500, "application/json", json.dumps({"error": type(error).__name__ + ": " + str(error)}))
+
+        self.__send(*response)
+
+    def __predict_json(self, body, query):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise PredictionError(400, "The body is not a valid JSON object.")
+        if not isinstance(data, dict) or not isinstance(data.get("rows"), list):
+            raise PredictionError(400, "The body should contain a list of rows.")
+
+        trained_model = self.__model(data.get("model") or query.get("model", [None])[0])
+        X = np.full((len(data["rows"]), len(trained_model.feature_names)), np.nan)
+
+        try:
+            for (row_index, row) in enumerate(data["rows"]):
+                values = [row.get(name) for name in trained_model.feature_names] if isinstance(row, dict) else row
+                if len(values) != len(trained_model.feature_names):
+                    raise PredictionError(400, "Row " + str(row_index) + " should contain " +
+                                          str(len(trained_model.feature_names)) + " values.")
+                X[row_index] = [np.nan if value is None else float(value) for value in values]
+        except (TypeError, ValueError):
+            raise PredictionError(400, "The feature values should be numeric.")
+
+        predicted_values = self.__predict(trained_model, X)
+        return json.dumps({"predictions": predicted_values.tolist()})
+
+    def __predict_csv(self, body, query):
+        trained_model = self.__model(query.get("model", [None])[0])
+        target_column_name = query.get("target", ["Hogwarts House"])[0]
+        reader = csv.reader(io.StringIO(body))
+        column_names = next(reader, [])
+        rows = [row for row in reader if len(row) > 0]
+
+        if any(len(row) != len(column_names) for row in rows):
+            raise PredictionError(400, "The file is not correctly formated.")
+
+        cells = list(zip(*rows)) if len(rows) > 0 else [() for _ in column_names]
+        feature_columns = []
+        for feature_name in trained_model.feature_names:
+            if feature_name not in column_names:
+                raise PredictionError(400, "Column " + feature_name + " doesn't exists.")
+            builder = column.ColumnBuilder(feature_name)
+            builder.append(cells[column_names.index(feature_name)])
+            feature_column = builder.build()
+            if not feature_column.is_numeric():
+                raise PredictionError(400, "Value for column " + feature_name + " should be numeric.")
+            feature_columns.append(feature_column)
+
+        X = np.array([feature_column.numeric_data() for feature_column in feature_columns]).T.reshape(len(rows), -1)
+        predicted_values = self.__predict(trained_model, X)
+        return "Index," + target_column_name + "".join("\n" + str(index) + "," + str(value)
+                                                       for (index, value) in enumerate(predicted_values))
+
+    def __model(self, model_file_name):
+        model_file_name = model_file_name or self.server.model_file_name
+        if not os.path.exists(model_file_name) and not os.path.exists(model_file_name + ".npz"):
+            raise PredictionError(404, "No such file named " + model_file_name)
+
+        try:
+            return model.Model.load(model_file_name)
+        except SystemExit:
+            raise PredictionError(400, "The model " + model_file_name + " can't be loaded.")
+        except (ValueError, KeyError, OSError) as error:
+            raise PredictionError(400, "The model " + model_file_name + " can't be loaded: " + type(error).__name__ +
+                                  " " + str(error))
+
+    def __predict(self, trained_model, X):
+        with np.errstate(invalid="ignore"):
+            X = trained_model.scaler.transform(X.T, copy=False).T
+        return self.server.batcher.predict(trained_model, X)
+
+    def __send(self, status, content_type, content):
+        content = content.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        # Logging every request to stderr would cost more than scoring its rows.
+        pass
+
+    def address_string(self):
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+
+class PredictionServer(http_server.ThreadingHTTPServer):
+
+    """
+    A localhost HTTP server keeping the compiled models in the Model.load cache, so that each request only pays for
+    its own rows.
+
+    Attributes:
+        model_file_name The model used by the requests that don't name one.
+        batcher         The PredictionBatcher scoring the rows of the requests.
+    """
+
+    request_queue_size = 128
+
+    def __init__(self, port=8000, model_file_name="train.mlmodel", batcher=None):
+        super().__init__(("127.0.0.1", port), PredictionRequestHandler)
+        self.model_file_name = model_file_name
+        self.batcher = PredictionBatcher() if batcher is None else batcher
+
+
+class UnixPredictionServer(socketserver.ThreadingUnixStreamServer):
+
+    """
+    A PredictionServer listening on a Unix socket instead of a localhost port.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, socket_file_name, model_file_name="train.mlmodel", batcher=None):
+        if os.path.exists(socket_file_name):
+            os.remove(socket_file_name)
+        super().__init__(socket_file_name, PredictionRequestHandler)
+        self.model_file_name = model_file_name
+        self.batcher = PredictionBatcher() if batcher is None else batcher
@@ -0,0 +1,203 @@
+import numpy as np
+import math
+
+
+class RunningStatistics:
+
+    """
+    Count, mean, variance, minimum and maximum of a stream of values, computed in a single pass (Welford) and
+    mergeable with the statistics of another part of the stream (Chan et al.).
+
+    Attributes:
+        count       The number of values.
+        mean        The mean of the values.
+        m2          The sum of the squared differences to the mean.
+        minimum     The smallest value.
+        maximum     The greatest value.
+    """
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, minimum=float("inf"), maximum=-float("inf")):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.minimum = minimum
+        self.maximum = maximum
+
+    def update(self, values):
+        """Add an array of values to the statistics."""
+        values = np.asarray(values, dtype=np.float64)
+        if values.shape[0] == 0:
+            return
+
+        mean = float(values.sum() / values.shape[0])
+        chunk = RunningStatistics(values.shape[0], mean, float(((values - mean) ** 2).sum()),
+                                  float(values.min()), float(values.max()))
+        self.merge(chunk)
+
+    def merge(self, other):
+        """Add the statistics of another part of the stream."""
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / count
+        self.count = count
+        self.minimum = min(self.minimum, other.minimum)
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def variance(self):
+        return self.m2 / self.count if self.count > 0 else None
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count > 0 else None
+
+    def to_dict(self):
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "min": self.minimum, "max": self.maximum}
+
+    @staticmethod
+    def from_dict(data):
+        return RunningStatistics(data["count"], data["mean"], data["m2"], data["min"], data["max"])
+
+
+class QuantileSketch:
+
+    """
+    A mergeable quantile sketch. Values are kept exactly until a level holds more than capacity values, the level is
+    then sorted and every other value is promoted to the next level with a double weight. The rank error stays below
+    count * log2(count / capacity) / capacity.
+
+    Attributes:
+        capacity    The number of values a level holds before being compacted.
+        count       The number of values added to the sketch.
+    """
+
+    def __init__(self, capacity=65536):
+        self.capacity = capacity
+        self.count = 0
+        self.__levels = [np.empty(0, dtype=np.float64)]
+        self.__offsets = [0]
+
+    def update(self, values):
+        """Add an array of values to the sketch."""
+        values = np.asarray(values, dtype=np.float64)
+        self.count += values.shape[0]
+        self.__levels[0] = np.concatenate([self.__levels[0], values])
+        self.__compact()
+
+    def merge(self, other):
+        """Add the values of another sketch."""
+        self.count += other.count
+        for (level, values) in enumerate(other.__levels):
+            if level == len(self.__levels):
+                self.__levels.append(np.empty(0, dtype=np.float64))
+                self.__offsets.append(0)
+            self.__levels[level] = np.concatenate([self.__levels[level], values])
+        self.__compact()
+
+    def __compact(self):
+        level = 0
+
+        while level < len(self.__levels):
+            values = self.__levels[level]
+
+            if values.shape[0] > self.capacity:
+                if level + 1 == len(self.__levels):
+                    self.__levels.append(np.empty(0, dtype=np.float64))
+                    self.__offsets.append(0)
+
+                values = np.sort(values)
+                kept = values[-1:] if values.shape[0] % 2 == 1 else values[:0]
+                paired = values[:values.shape[0] - kept.shape[0]]
+
+                # Alternate the promoted half so the rank error doesn't drift in one direction.
+                self.__levels[level + 1] = np.concatenate([self.__levels[level + 1], paired[self.__offsets[level]::2]])
+                self.__offsets[level] = 1 - self.__offsets[level]
+                self.__levels[level] = kept
+
+            level += 1
+
+    def value_at_rank(self, rank):
+        """Return the value at a given index of the sorted values."""
+        if self.count == 0:
+            return None
+
+        values = np.concatenate(self.__levels)
+        weights = np.concatenate([np.full(values.shape[0], 2 ** level) for (level, values) in enumerate(self.__levels)])
+        order = np.argsort(values, kind="stable")
+        cumulative_weights = np.cumsum(weights[order])
+        index = min(int(np.searchsorted(cumulative_weights, rank, side="right")), order.shape[0] - 1)
+
+        return float(values[order[index]])
+
+
+def values_at_ranks(values, ranks):
+    """Return the values at given indexes of the sorted values, by selection instead of a full sort."""
+    if values.shape[0] == 0:
+        return [None for _ in ranks]
+
+    partitioned_values = np.partition(values, ranks)
+    return [float(partitioned_values[rank]) for rank in ranks]
+
+
+def quartile_ranks(count):
+    """Return the indexes of the 25%, 50% and 75% values in count sorted values."""
+    return [min(round(count * quarter / 4), count - 1) for quarter in (1, 2, 3)]
+
+
+class ColumnStatistics:
+
+    """
+    The mergeable statistics of a column, computed chunk by chunk. String columns can only be merged between chunks
+    sharing the same dictionary, as the ones read by DataTable.read_chunks.
+
+    Attributes:
+        name        The name of the column.
+        type        The ColumnAttributes.Type of the column.
+        is_mixed    True if the column contains different value types.
+        categories  The distinct values of a string column, in order of appearance.
+        category_codes  The code of each distinct value of a string column.
+        running     The RunningStatistics of the column values.
+        sketch      The QuantileSketch of the column values.
+    """
+
+    def __init__(self, name, capacity=65536):
+        self.name = name
+        self.type = None
+        self.is_mixed = False
+        self.categories = []
+        self.category_codes = {}
+        self.running = RunningStatistics()
+        self.sketch = QuantileSketch(capacity)
+
+    def update(self, column):
+        """Add the values of a Column chunk."""
+        self.__merge_type(column.type, column.is_mixed)
+        if len(column.categories) > len(self.categories):
+            self.categories = column.categories
+            self.category_codes = column.category_codes
+
+        values = column.numeric_data()[column.mask]
+        self.running.update(values)
+        self.sketch.update(values)
+
+    def merge(self, other):
+        """Add the statistics of another part of the column."""
+        self.__merge_type(other.type, other.is_mixed)
+        if len(other.categories) > len(self.categories):
+            self.categories = other.categories
+            self.category_codes = other.category_codes
+
+        self.running.merge(other.running)
+        self.sketch.merge(other.sketch)
+
+    def __merge_type(self, column_type, is_mixed):
+        self.is_mixed = self.is_mixed or is_mixed
+        if column_type is None:
+            return
+        if self.type is not None and self.type != column_type:
+            self.is_mixed = True
+        self.type = column_type
@@ -0,0 +1,67 @@
+import os
+import csv
+import numpy as np
+
+HOUSES = ["Gryffindor", "Hufflepuff", "Ravenclaw", "Slytherin"]
+COURSES = ["Arithmancy", "Astronomy", "Herbology", "Defense Against the Dark Arts", "Divination", "Muggle Studies",
+           "Ancient Runes", "History of Magic", "Transfiguration", "Potions", "Care of Magical Creatures", "Charms",
+           "Flying"]
+FIRST_NAMES = ["Harry", "Hermione", "Ron", "Luna", "Cedric", "Cho", "Draco", "Neville", "Ginny", "Seamus"]
+LAST_NAMES = ["Potter", "Granger", "Weasley", "Lovegood", "Diggory", "Chang", "Malfoy", "Longbottom", "Finnigan"]
+
+
+def course_names(width):
+    """Return the names of width course columns: the courses of the dataset, then numbered courses."""
+    return COURSES[:width] + ["Course " + str(index) for index in range(len(COURSES) + 1, width + 1)]
+
+
+def parse_size(size):
+    """Return a number of rows written as an integer, or with a k or M suffix."""
+    size = str(size)
+    multipliers = {"k": 1000, "M": 1000000}
+    if size[-1] in multipliers:
+        return int(float(size[:-1]) * multipliers[size[-1]])
+    return int(size)
+
+
+def generate_dataset(file_name, rows, width=len(COURSES), missing_rate=0.02, seed=0, chunk_size=100000):
+    """Write a csv file shaped like dataset_train.csv, with rows students and width course columns. Each house has its
+    own mean mark in every course, and missing_rate of the marks are missing."""
+    random = np.random.RandomState(seed)
+    names = course_names(width)
+    house_means = random.uniform(-500, 500, (len(HOUSES), width))
+    course_deviations = random.uniform(1, 200, width)
+
+    with open(file_name, "w", newline="") as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(["Index", "Hogwarts House", "First Name", "Last Name", "Birthday", "Best Hand"] + names)
+
+        for start in range(0, rows, chunk_size):
+            count = min(chunk_size, rows - start)
+            houses = random.randint(0, len(HOUSES), count)
+            marks = house_means[houses] + random.randn(count, width) * course_deviations
+            marks = np.round(marks, 6).astype(str).astype(object)
+            marks[random.uniform(size=(count, width)) < missing_rate] = ""
+            birthdays = ["%d-%02d-%02d" % birthday for birthday in zip(random.randint(1990, 2002, count),
+                                                                         random.randint(1, 13, count),
+                                                                         random.randint(1, 29, count))]
+
+            columns = [np.arange(start, start + count).tolist(),
+                       np.array(HOUSES)[houses].tolist(),
+                       np.array(FIRST_NAMES)[random.randint(0, len(FIRST_NAMES), count)].tolist(),
+                       np.array(LAST_NAMES)[random.randint(0, len(LAST_NAMES), count)].tolist(),
+                       birthdays,
+                       np.where(random.uniform(size=count) < 0.5, "Left", "Right").tolist()]
+            writer.writerows(zip(*columns, *marks.T.tolist()))
+
+
+def dataset_file_name(directory, rows, width, seed=0):
+    """Return the csv file of a generated dataset, generating it the first time."""
+    file_name = os.path.join(directory, "hogwarts_%d_%d_%d.csv" % (rows, width, seed))
+
+    if not os.path.exists(file_name):
+        os.makedirs(directory, exist_ok=True)
+        generate_dataset(file_name + ".tmp", rows, width, seed=seed)
+        os.replace(file_name + ".tmp", file_name)
+
+    return file_name
@@ -0,0 +1,79 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIRECTORY)
+
+import MLKit
+
+
+def script_commands(output_directory):
+    """Return the command of each script, with the arguments of a typical call."""
+    train_file_name = os.path.join("dataset", "dataset_train.csv")
+    test_file_name = os.path.join("dataset", "dataset_test.csv")
+    model_file_name = os.path.join(output_directory, "train")
+
+    return [
+        ("import MLKit", ["-c", "import MLKit"]),
+        ("describe.py", ["describe.py", train_file_name]),
+        ("log_reg_train.py", ["log_reg_train.py", train_file_name, "-o", model_file_name]),
+        ("log_reg_predict.py", ["log_reg_predict.py", test_file_name, "-m", model_file_name + ".mlmodel", "-s",
+                                os.path.join(output_directory, "houses.csv")]),
+        ("histogram.py", ["histogram.py", train_file_name]),
+        ("scatter_plot.py", ["scatter_plot.py", train_file_name]),
+        ("pair_plot.py", ["pair_plot.py", train_file_name])
+    ]
+
+
+def measure(arguments, environment):
+    """Run a command once. Returns the seconds until its first output line, and until it exits."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable] + arguments, cwd=ROOT_DIRECTORY, env=environment,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    process.stdout.readline()
+    first_output = time.perf_counter() - start
+    process.communicate()
+    total = time.perf_counter() - start
+
+    if process.returncode != 0:
+        MLKit.display.error(" ".join(arguments) + " failed.")
+
+    return first_output, total
+
+
+if __name__ == "__main__":
+    MLKit.CommandLine.register_flag("r", description="The number of runs of each script.", default_value=5)
+    MLKit.CommandLine.register_flag("j", description="The json file name to save the results in.")
+    MLKit.CommandLine.register_usage("benchmarks/startup.py run\nMeasure the import and first result latency of each script.")
+    MLKit.CommandLine.show_usage_if_needed()
+
+    runs = int(MLKit.CommandLine.get_value_for_flag("r"))
+    json_file_name = MLKit.CommandLine.get_value_for_flag("j")
+    results = {}
+
+    with tempfile.TemporaryDirectory() as output_directory:
+        # Plots are drawn without a window.
+        environment = dict(os.environ, MPLBACKEND="Agg")
+
+        for (name, arguments) in script_commands(output_directory):
+            # Each run starts with an empty csv cache, so that every run measures a cold start.
+            measures = [measure(arguments, dict(environment, MLKIT_CACHE_DIR=tempfile.mkdtemp(dir=output_directory)))
+                        for _ in range(runs)]
+            results[name] = {
+                "first_output": min(first_output for (first_output, _) in measures),
+                "total": min(total for (_, total) in measures),
+                "runs": runs
+            }
+
+    print(MLKit.display.sized_str("", 20) + MLKit.display.sized_str("first output", 15) + MLKit.display.sized_str("total", 15))
+    for (name, result) in results.items():
+        print(MLKit.display.sized_str(name, 20) + MLKit.display.sized_str("%.3fs" % result["first_output"], 15) +
+              MLKit.display.sized_str("%.3fs" % result["total"], 15))
+
+    if json_file_name is not None:
+        with open(json_file_name, "w") as json_file:
+            json.dump(results, json_file, indent=4)
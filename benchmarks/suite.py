@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import resource
+import platform
+import contextlib
+import multiprocessing
+import concurrent.futures
+import numpy as np
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARKS_DIRECTORY))
+
+import MLKit
+import datasets
+
+STAGES = ["load", "describe", "train", "predict"]
+TARGET_COLUMN_NAME = "Hogwarts House"
+
+
+def memory_usage():
+    """Return the resident memory and the peak resident memory of the process, in bytes. The peak only covers the time
+    since the last reset_peak_memory call on Linux, the resident memory is None on other systems."""
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as status_file:
+            status = dict(line.split(":", 1) for line in status_file if ":" in line)
+        return int(status["VmRSS"].split()[0]) * 1024, int(status["VmHWM"].split()[0]) * 1024
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return None, peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_memory():
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs_file:
+            clear_refs_file.write("5")
+    except OSError:
+        pass
+
+
+def run_stage(stage, file_name, model_file_name, feature_names, optimizer):
+    """Run the steps a stage depends on, then time the stage. Returns its seconds, the peak memory of the process and
+    the peak memory the stage allocated over the memory of its previous steps."""
+    np.random.seed(0)
+    trained_model = MLKit.Model.load(model_file_name + ".mlmodel") if stage == "predict" else None
+    columns = None if stage in ["load", "describe"] else [TARGET_COLUMN_NAME] + feature_names
+    stage_start = None
+
+    with open(os.devnull, "w") as null_file, contextlib.redirect_stdout(null_file):
+        if stage == "load":
+            stage_start = start_stage()
+        data_table = MLKit.DataTable(file_name, cache=False, columns=columns)
+        data_table.all_columns()
+
+        if stage == "describe":
+            stage_start = start_stage()
+            data_table.compute_columns_attributes()
+            data_table.all_columns()
+        elif stage == "train":
+            data_table.compute_columns_attributes()
+            data_table.all_columns()
+            stage_start = start_stage()
+            data_table.train(TARGET_COLUMN_NAME, feature_names, model_file_name, optimizer=optimizer)
+        elif stage == "predict":
+            stage_start = start_stage()
+            data_table.compute_columns_attributes(model=trained_model)
+            data_table.predict(TARGET_COLUMN_NAME, trained_model)
+
+    seconds = time.perf_counter() - stage_start[0]
+    (_, peak) = memory_usage()
+    return seconds, peak, peak - stage_start[1]
+
+
+def start_stage():
+    (memory, peak) = memory_usage()
+    reset_peak_memory()
+    return time.perf_counter(), peak if memory is None else memory
+
+
+def run_benchmark(file_name, model_file_name, feature_names, optimizer, runs):
+    """Run every stage in fresh processes, so that the peak memory of a stage doesn't include the previous stages.
+    Returns the fastest of runs timings of each stage."""
+    results = {}
+    context = multiprocessing.get_context("spawn")
+
+    for stage in STAGES:
+        measures = []
+        for _ in range(runs):
+            with concurrent.futures.ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                measures.append(executor.submit(run_stage, stage, file_name, model_file_name, feature_names,
+                                               optimizer).result())
+
+        results[stage] = {
+            "seconds": min(seconds for (seconds, _, _) in measures),
+            "peak_memory": max(memory for (_, memory, _) in measures),
+            "stage_memory": max(memory for (_, _, memory) in measures)
+        }
+
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """Return the stages whose time or peak memory exceeds the baseline by more than tolerance."""
+    found = []
+
+    for (size, stages) in results.items():
+        for (stage, result) in stages.items():
+            baseline_result = baseline.get(size, {}).get(stage)
+            if baseline_result is None:
+                continue
+            for key in ["seconds", "peak_memory"]:
+                if result[key] > baseline_result[key] * (1 + tolerance):
+                    found.append((size, stage, key, baseline_result[key], result[key]))
+
+    return found
+
+
+def display_results(results):
+    header = MLKit.display.sized_str("rows", 12) + MLKit.display.sized_str("stage", 12)
+    print(header + MLKit.display.sized_str("seconds", 12) + MLKit.display.sized_str("peak MiB", 12) +
+          MLKit.display.sized_str("stage MiB", 12))
+
+    for (size, stages) in results.items():
+        for (stage, result) in stages.items():
+            print(MLKit.display.sized_str(size, 12) + MLKit.display.sized_str(stage, 12) +
+                  MLKit.display.sized_str("%.3f" % result["seconds"], 12) +
+                  MLKit.display.sized_str("%.1f" % (result["peak_memory"] / 1024 ** 2), 12) +
+                  MLKit.display.sized_str("%.1f" % (result["stage_memory"] / 1024 ** 2), 12))
+
+
+if __name__ == "__main__":
+    MLKit.CommandLine.register_flag("s", description="The numbers of rows of the datasets, with an optional k or M suffix.", default_value=["10k"], has_multiple_values=True)
+    MLKit.CommandLine.register_flag("w", description="The number of course columns of the datasets.", default_value=len(datasets.COURSES))
+    MLKit.CommandLine.register_flag("r", description="The number of runs of each stage.", default_value=3)
+    MLKit.CommandLine.register_flag("O", description="The optimizer of the train stage: gd, adam, newton or lbfgs. Gradient descent takes minutes from 1M rows.", default_value="gd")
+    MLKit.CommandLine.register_flag("d", description="The directory of the generated datasets.", default_value=os.path.join(BENCHMARKS_DIRECTORY, "data"))
+    MLKit.CommandLine.register_flag("j", description="The json file name to save the results in.")
+    MLKit.CommandLine.register_flag("b", description="The json file name of baseline results to compare with.")
+    MLKit.CommandLine.register_flag("t", description="The tolerated increase over the baseline before a regression is reported.", default_value=0.2)
+    MLKit.CommandLine.register_usage("benchmarks/suite.py run\nTime the load, describe, train and predict stages on generated datasets, and record their peak memory.")
+    MLKit.CommandLine.show_usage_if_needed()
+
+    sizes = MLKit.CommandLine.get_value_for_flag("s")
+    sizes = [sizes] if isinstance(sizes, str) else sizes
+    width = int(MLKit.CommandLine.get_value_for_flag("w"))
+    runs = int(MLKit.CommandLine.get_value_for_flag("r"))
+    optimizer = MLKit.CommandLine.get_value_for_flag("O")
+    data_directory = MLKit.CommandLine.get_value_for_flag("d")
+    json_file_name = MLKit.CommandLine.get_value_for_flag("j")
+    baseline_file_name = MLKit.CommandLine.get_value_for_flag("b")
+    tolerance = float(MLKit.CommandLine.get_value_for_flag("t"))
+
+    feature_names = datasets.course_names(width)[:3]
+    results = {}
+
+    for size in sizes:
+        rows = datasets.parse_size(size)
+        file_name = datasets.dataset_file_name(data_directory, rows, width)
+        model_file_name = os.path.join(data_directory, "model_%d_%d" % (rows, width))
+        results[str(rows)] = run_benchmark(file_name, model_file_name, feature_names, optimizer, runs)
+
+    display_results(results)
+
+    if json_file_name is not None:
+        with open(json_file_name, "w") as json_file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__, "width": width, "optimizer": optimizer,
+                       "results": results}, json_file, indent=4)
+
+    if baseline_file_name is not None:
+        with open(baseline_file_name) as baseline_file:
+            found = regressions(results, json.load(baseline_file)["results"], tolerance)
+
+        for (rows, stage, key, baseline_value, value) in found:
+            MLKit.display.warning("%s rows, %s: %s went from %.3f to %.3f" % (rows, stage, key, baseline_value, value))
+        if len(found) > 0:
+            sys.exit(1)
+        MLKit.display.success("No regression over the baseline.")
@@ -3,13 +3,22 @@ import MLKit
 if __name__ == "__main__":
     MLKit.CommandLine.register_flag("s", description="Start index of column to display.", default_value=0)
     MLKit.CommandLine.register_flag("e", description="End index of column to display.", default_value=-1)
+    MLKit.CommandLine.register_flag("c", description="Compute the attributes by chunks of this number of rows, for files that don't fit in memory.")
+    MLKit.CommandLine.register_flag("j", description="Number of processes computing the attributes of the columns.", default_value=1)
     MLKit.CommandLine.register_usage("Display the attributes of a csv data file.")
+    MLKit.Profiler.register_flag()
     MLKit.CommandLine.show_usage_if_needed()
+    MLKit.Profiler.enable_if_needed()
 
     file_name = MLKit.CommandLine.get_argument_at_index(1)
     start_index = int(MLKit.CommandLine.get_value_for_flag("s"))
     end_index = int(MLKit.CommandLine.get_value_for_flag("e"))
+    chunk_size = MLKit.CommandLine.get_value_for_flag("c")
+    workers = int(MLKit.CommandLine.get_value_for_flag("j"))
 
-    data_table = MLKit.DataTable(file_name)
-    data_table.compute_columns_attributes()
+    if chunk_size is None:
+        data_table = MLKit.DataTable(file_name)
+        data_table.compute_columns_attributes(workers=workers)
+    else:
+        data_table = MLKit.DataTable.read_attributes(file_name, chunk_size=int(chunk_size))
     data_table.display_attributes(from_index=start_index, to_index=end_index)
@@ -11,6 +11,7 @@ if __name__ == "__main__":
     MLKit.CommandLine.register_flag("r", description="The row of the target column.", default_value=default_rows, has_multiple_values=True)
     MLKit.CommandLine.register_flag("X", description="The features of the histogram.", default_value=default_features, has_multiple_values=True)
     MLKit.CommandLine.register_flag("Y", description="The target column.", default_value=default_target_column)
+    MLKit.CommandLine.register_flag("s", description="Scale the values of each feature to a zero mean and a unit standard deviation.", default_value=False, require_parameters=False)
     MLKit.CommandLine.register_usage("Display an histogram from a csv data file.")
     MLKit.CommandLine.show_usage_if_needed()
 
@@ -18,7 +19,8 @@ if __name__ == "__main__":
     rows = MLKit.CommandLine.get_value_for_flag("r")
     features = MLKit.CommandLine.get_value_for_flag("X")
     target_column = MLKit.CommandLine.get_value_for_flag("Y")
+    scaled = MLKit.CommandLine.get_value_for_flag("s")
     
-    data_table = MLKit.DataTable(file_name)
+    data_table = MLKit.DataTable(file_name, columns=[target_column] + features)
     data_table.compute_columns_attributes()
-    data_table.display_histogram(target_column, rows, features)
+    data_table.display_histogram(target_column, rows, features, scaled=scaled)
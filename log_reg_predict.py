@@ -7,20 +7,54 @@ if __name__ == "__main__":
     MLKit.command_line.CommandLine.register_flag("Y", description="The target column where the values should be predicted.", default_value=default_target_column)
     MLKit.command_line.CommandLine.register_flag("m", description="The model file name used to predict values.", default_value=default_model)
     MLKit.command_line.CommandLine.register_flag("s", description="The csv file name with the predicted values.")
-    MLKit.command_line.CommandLine.register_usage("log_reg_predict.py [csv_file_name]\nPredict the value of a csv data file from a trained model.")
+    MLKit.command_line.CommandLine.register_flag("c", description="Predict the file by chunks of this number of rows, for files that don't fit in memory.")
+    MLKit.command_line.CommandLine.register_flag("f", description="Predict these csv files or glob patterns across a pool of processes, each file into a csv file of the -d directory, or every file into the -s csv file.", has_multiple_values=True)
+    MLKit.command_line.CommandLine.register_flag("d", description="The directory of the csv files with the predicted values of the -f files.", default_value="predictions")
+    MLKit.command_line.CommandLine.register_flag("j", description="Number of processes predicting the -f files. Uses every core if not set.")
+    MLKit.command_line.CommandLine.register_flag("p", description="Write the probability of each value after the predicted value.", default_value=False, require_parameters=False)
+    MLKit.command_line.CommandLine.register_flag("k", description="Write the k most probable values of each row with their probability after the predicted value.")
+    MLKit.command_line.CommandLine.register_usage("log_reg_predict.py [csv_file_name]\nlog_reg_predict.py -f [csv_file_names]\nPredict the value of csv data files from a trained model.")
+    MLKit.profiler.Profiler.register_flag()
     MLKit.command_line.CommandLine.show_usage_if_needed()
+    MLKit.profiler.Profiler.enable_if_needed()
 
     file_name = MLKit.command_line.CommandLine.get_argument_at_index(1)
     target_column_name = MLKit.command_line.CommandLine.get_value_for_flag("Y")
     model_file_name = MLKit.command_line.CommandLine.get_value_for_flag("m")
     output_csv = MLKit.command_line.CommandLine.get_value_for_flag("s")
+    chunk_size = MLKit.command_line.CommandLine.get_value_for_flag("c")
+    batch_file_names = MLKit.command_line.CommandLine.get_value_for_flag("f")
+    output_directory = MLKit.command_line.CommandLine.get_value_for_flag("d")
+    workers = MLKit.command_line.CommandLine.get_value_for_flag("j")
+    all_probabilities = MLKit.command_line.CommandLine.get_value_for_flag("p")
+    top_k = MLKit.command_line.CommandLine.get_value_for_flag("k")
+    top_k = None if top_k is None else int(top_k)
 
-    data_table = MLKit.data_table.DataTable(file_name)
-    model = MLKit.file_manager.get_model_data(model_file_name)
-    data_table.compute_columns_attributes(model=model)
-    data_table.predict(target_column_name, model)
+    if top_k is not None and top_k < 1:
+        MLKit.display.error("The number of most probable values should be greater than 0.")
 
-    if output_csv is None:
-        data_table.save()
+    model = MLKit.Model.load(model_file_name)
+
+    if batch_file_names is not None:
+        batch_file_names = [batch_file_names] if isinstance(batch_file_names, str) else batch_file_names
+        predictor = MLKit.BatchPredictor(model_file_name, target_column_name, workers=None if workers is None else int(workers),
+                                         chunk_size=int(chunk_size or MLKit.file_manager.DEFAULT_CHUNK_SIZE), all_probabilities=all_probabilities, top_k=top_k)
+        file_names = predictor.file_names_of(batch_file_names)
+        if output_csv is None:
+            predictor.predict(file_names, output_directory)
+        else:
+            predictor.predict_merged(file_names, output_csv)
+    elif chunk_size is not None:
+        MLKit.data_table.DataTable.predict_file(file_name, target_column_name, model, output_csv or "houses.csv", chunk_size=int(chunk_size),
+                                                all_probabilities=all_probabilities, top_k=top_k)
     else:
-        data_table.save(file_name=output_csv)
+        data_table = MLKit.data_table.DataTable(file_name, columns=[target_column_name] + model.feature_names)
+        data_table.compute_columns_attributes(model=model)
+        probabilities = data_table.predict(target_column_name, model)
+        # The probabilities of the prediction are written as they are, without scoring the rows again.
+        probability_columns = model.probability_columns(probabilities, all_probabilities, top_k) if all_probabilities or top_k is not None else None
+
+        if output_csv is None:
+            data_table.save(target_column_name, extra_columns=probability_columns, decimals=6)
+        else:
+            data_table.save(target_column_name, file_name=output_csv, extra_columns=probability_columns, decimals=6)
@@ -9,8 +9,22 @@ if __name__ == "__main__":
     command_line.CommandLine.register_flag("o", description="The output file name.", default_value="train")
     command_line.CommandLine.register_flag("l", description="The learning rate.", default_value=0.001)
     command_line.CommandLine.register_flag("a", description="The accuracy split to train the data.")
+    command_line.CommandLine.register_flag("m", description="The multi-class objective: ovr or softmax.", default_value="ovr")
+    command_line.CommandLine.register_flag("b", description="The number of rows of each gradient descent step. Uses every row if not set, 1 for a stochastic gradient descent.")
+    command_line.CommandLine.register_flag("e", description="The maximum number of epochs with mini-batches.", default_value=100)
+    command_line.CommandLine.register_flag("n", description="Don't shuffle the rows before each epoch.", default_value=False, require_parameters=False)
+    command_line.CommandLine.register_flag("O", description="The optimizer: gd, adam, newton or lbfgs.", default_value="gd")
+    command_line.CommandLine.register_flag("c", description="Train by chunks of this number of rows, without loading the file in memory, with the gd or adam optimizer.")
+    command_line.CommandLine.register_flag("k", description="Cross-validate with this number of folds every learning rate of -L and feature set of -F, instead of training a model.")
+    command_line.CommandLine.register_flag("L", description="The learning rates to cross-validate.", has_multiple_values=True)
+    command_line.CommandLine.register_flag("F", description="The feature sets to cross-validate, each one as comma separated features.", has_multiple_values=True)
+    command_line.CommandLine.register_flag("j", description="Number of processes training the cross-validation models. Uses every core if not set.")
+    command_line.CommandLine.register_flag("w", description="The model file name to update with the rows of the csv file, instead of training from scratch.")
+    command_line.CommandLine.register_flag("i", description="The imputation of the missing values: mean, median or class_mean (the mean of the class of the row). An updated model keeps its imputation, which can't be median.", default_value="mean")
     command_line.CommandLine.register_usage("Build a model from a csv file.\nlog_reg_train.py [train_model]")
+    profiler.Profiler.register_flag()
     command_line.CommandLine.show_usage_if_needed()
+    profiler.Profiler.enable_if_needed()
 
     input_file_name = command_line.CommandLine.get_argument_at_index(1)
     output_file_name = command_line.CommandLine.get_value_for_flag("o")
@@ -19,10 +33,48 @@ if __name__ == "__main__":
     learning_rate = float(command_line.CommandLine.get_value_for_flag("l"))
     accuracy_split = command_line.CommandLine.get_value_for_flag("a")
     accuracy_split = None if accuracy_split is None else float(accuracy_split)
+    multi_class = command_line.CommandLine.get_value_for_flag("m")
+    batch_size = command_line.CommandLine.get_value_for_flag("b")
+    batch_size = None if batch_size is None else int(batch_size)
+    epochs = int(command_line.CommandLine.get_value_for_flag("e"))
+    shuffle = not command_line.CommandLine.get_value_for_flag("n")
+    optimizer = command_line.CommandLine.get_value_for_flag("O")
+    chunk_size = command_line.CommandLine.get_value_for_flag("c")
+    initial_model_file_name = command_line.CommandLine.get_value_for_flag("w")
+    folds = command_line.CommandLine.get_value_for_flag("k")
+    imputation = command_line.CommandLine.get_value_for_flag("i")
 
-    data_table = data_table.DataTable(input_file_name)
-    data_table.compute_columns_attributes()
-    data_table.train(target_column, default_features, output_file_name, learning_rate=learning_rate, accuracy_split=accuracy_split)
+    if folds is not None:
+        learning_rates = command_line.CommandLine.get_value_for_flag("L") or [learning_rate]
+        learning_rates = [float(value) for value in ([learning_rates] if isinstance(learning_rates, str) else learning_rates)]
+        features_sets = command_line.CommandLine.get_value_for_flag("F") or [",".join(default_features)]
+        features_sets = [features_set.split(",") for features_set in ([features_sets] if isinstance(features_sets, str) else features_sets)]
+        workers = command_line.CommandLine.get_value_for_flag("j")
 
-    if accuracy_split is not None:
-        data_table.accuracy(output_file_name)
+        data_table = data_table.DataTable(input_file_name, columns=[target_column] + [feature for features_set in features_sets for feature in features_set])
+        data_table.compute_columns_attributes()
+        results = data_table.cross_validate(target_column, features_sets, learning_rates, folds=int(folds), workers=None if workers is None else int(workers),
+                                            multi_class=multi_class, batch_size=batch_size, epochs=epochs, shuffle=shuffle, optimizer=optimizer,
+                                            imputation=imputation)
+        cross_validation.GridSearch.display_results(results)
+    elif initial_model_file_name is not None:
+        if accuracy_split is not None:
+            display.error("The accuracy split can't be used when updating a model.")
+        initial_model = model.Model.load(initial_model_file_name)
+        data_table.DataTable.train_file(input_file_name, target_column, initial_model.feature_names, output_file_name, learning_rate=learning_rate,
+                                        chunk_size=int(chunk_size or file_manager.DEFAULT_CHUNK_SIZE), batch_size=batch_size, epochs=epochs,
+                                        shuffle=shuffle, optimizer=optimizer, initial_model=initial_model)
+    elif chunk_size is not None:
+        if accuracy_split is not None:
+            display.error("The accuracy split can't be used when training by chunks.")
+        data_table.DataTable.train_file(input_file_name, target_column, default_features, output_file_name, learning_rate=learning_rate,
+                                        chunk_size=int(chunk_size), multi_class=multi_class, batch_size=batch_size, epochs=epochs,
+                                        shuffle=shuffle, optimizer=optimizer, imputation=imputation)
+    else:
+        data_table = data_table.DataTable(input_file_name, columns=[target_column] + default_features)
+        data_table.compute_columns_attributes()
+        data_table.train(target_column, default_features, output_file_name, learning_rate=learning_rate, accuracy_split=accuracy_split, multi_class=multi_class,
+                         batch_size=batch_size, epochs=epochs, shuffle=shuffle, optimizer=optimizer, imputation=imputation)
+
+        if accuracy_split is not None:
+            data_table.accuracy(output_file_name)
@@ -13,6 +13,6 @@ if __name__ == "__main__":
     target_column_name = MLKit.CommandLine.get_value_for_flag("Y")
     features = MLKit.CommandLine.get_value_for_flag("X")
 
-    data_table = MLKit.DataTable(file_name)
+    data_table = MLKit.DataTable(file_name, columns=[target_column_name] + features)
     data_table.compute_columns_attributes()    
     data_table.display_pair_plot(target_column_name, features)
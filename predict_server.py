@@ -0,0 +1,31 @@
+import MLKit
+
+if __name__ == "__main__":
+    default_model = "train.mlmodel"
+
+    MLKit.CommandLine.register_flag("p", description="The localhost port of the server.", default_value=8000)
+    MLKit.CommandLine.register_flag("u", description="The Unix socket file name to listen on, instead of a localhost port.")
+    MLKit.CommandLine.register_flag("m", description="The model file name used by the requests that don't name one.", default_value=default_model)
+    MLKit.CommandLine.register_flag("b", description="The number of rows after which a batch of requests is scored.", default_value=MLKit.file_manager.DEFAULT_CHUNK_SIZE)
+    MLKit.CommandLine.register_flag("w", description="The number of milliseconds a request waits for other requests to fill its batch.", default_value=2)
+    MLKit.CommandLine.register_usage("predict_server.py [-p port | -u socket_file_name]\nServe the predictions of trained models: POST /predict with a JSON "
+                                     "{\"model\": ..., \"rows\": [...]} or a csv body.")
+    MLKit.CommandLine.show_usage_if_needed()
+
+    port = int(MLKit.CommandLine.get_value_for_flag("p"))
+    socket_file_name = MLKit.CommandLine.get_value_for_flag("u")
+    model_file_name = MLKit.CommandLine.get_value_for_flag("m")
+    batcher = MLKit.server.PredictionBatcher(max_rows=int(MLKit.CommandLine.get_value_for_flag("b")),
+                                             max_wait=float(MLKit.CommandLine.get_value_for_flag("w")) / 1000)
+
+    if socket_file_name is None:
+        prediction_server = MLKit.server.PredictionServer(port, model_file_name, batcher)
+        MLKit.success("Serving predictions on http://127.0.0.1:" + str(port) + "/predict")
+    else:
+        prediction_server = MLKit.server.UnixPredictionServer(socket_file_name, model_file_name, batcher)
+        MLKit.success("Serving predictions on " + socket_file_name)
+
+    try:
+        prediction_server.serve_forever()
+    except KeyboardInterrupt:
+        prediction_server.server_close()
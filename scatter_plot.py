@@ -10,17 +10,14 @@ if __name__ == "__main__":
     features = ["Arithmancy", "Astronomy", "Herbology", "Defense Against the Dark Arts", "Divination", "Muggle Studies",
                 "Ancient Runes", "History of Magic", "Transfiguration", "Potions", "Care of Magical Creatures",
                 "Charms", "Flying"]
-    data = data_table.values_for_target_column_named("Hogwarts House", houses, features, scaled=False)
+    groups = data_table.group_by("Hogwarts House")
+    x_column = data_table.column_named(features[1])
+    y_column = data_table.column_named(features[3])
     fig, axs = plt.subplots(num="scatter plot", figsize=(15, 10))
     plt.xlabel(features[1])
     plt.ylabel(features[3])
     for house in houses:
-        while None in data[house][features[1]]:
-            del data[house][features[3]][data[house][features[1]].index(None)]
-            del data[house][features[1]][data[house][features[1]].index(None)]
-        while None in data[house][features[3]]:
-            del data[house][features[1]][data[house][features[3]].index(None)]
-            del data[house][features[3]][data[house][features[3]].index(None)]
-        l1 = axs.scatter(data[house][features[1]], data[house][features[3]], label=house)
+        data = groups.values_of(house, [x_column, y_column])
+        l1 = axs.scatter(data[features[1]], data[features[3]], label=house)
     fig.legend(houses, loc='upper right')
     plt.show()
@@ -0,0 +1,74 @@
+from MLKit import data_table
+from MLKit import file_manager
+import shutil
+import json
+import os
+import pytest
+
+
+@pytest.fixture
+def csv_file_name(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLKIT_CACHE_DIR", str(tmp_path / "cache"))
+    file_name = str(tmp_path / "dataset_train.csv")
+    shutil.copy(os.path.join(os.path.dirname(__file__), "..", "dataset", "dataset_train.csv"), file_name)
+    return file_name
+
+
+def _forbid_csv_reads(monkeypatch):
+    def get_csv_chunks(*args, **kwargs):
+        raise AssertionError("The csv file was read instead of its cache.")
+    monkeypatch.setattr(file_manager, "get_csv_chunks", get_csv_chunks)
+
+
+def _describe(file_name):
+    table = data_table.DataTable(file_name)
+    table.compute_columns_attributes()
+    for column in table.all_columns():
+        assert column.attributes is not None
+    return table
+
+
+def test_second_load_is_a_cache_hit(csv_file_name, monkeypatch):
+    first_table = _describe(csv_file_name)
+    _forbid_csv_reads(monkeypatch)
+    second_table = _describe(csv_file_name)
+
+    assert [column.name for column in second_table.all_columns()] == \
+        [column.name for column in first_table.all_columns()]
+    for (first_column, second_column) in zip(first_table.all_columns(), second_table.all_columns()):
+        assert first_column.values == second_column.values
+        assert first_column.attributes.to_dict() == second_column.attributes.to_dict()
+
+
+def test_broken_cache_entry_is_replaced(csv_file_name, monkeypatch):
+    _describe(csv_file_name)
+    metadata_file_name = os.path.join(file_manager._cache_entry_directory(csv_file_name), "metadata.json")
+    with open(metadata_file_name, "r") as file_descriptor:
+        metadata = json.load(file_descriptor)
+    del metadata["arrays"]
+    with open(metadata_file_name, "w") as file_descriptor:
+        json.dump(metadata, file_descriptor)
+    assert file_manager.get_csv_cache(csv_file_name) is None
+
+    _describe(csv_file_name)
+    _forbid_csv_reads(monkeypatch)
+    _describe(csv_file_name)
+
+
+def test_projected_load_caches_its_columns(csv_file_name, monkeypatch):
+    columns = ["Hogwarts House", "Astronomy", "Herbology"]
+    data_table.DataTable(csv_file_name, columns=columns).all_columns()
+    _forbid_csv_reads(monkeypatch)
+
+    table = data_table.DataTable(csv_file_name, columns=columns)
+    assert [column.name for column in table.all_columns()] == columns
+    with pytest.raises(AssertionError):
+        data_table.DataTable(csv_file_name)
+
+
+def test_only_parsed_columns_are_cached(csv_file_name):
+    table = data_table.DataTable(csv_file_name)
+    table.column_named("Astronomy").numeric_data()
+
+    (metadata, _) = file_manager.get_csv_cache(csv_file_name)
+    assert [column_metadata["name"] for column_metadata in metadata["columns"]] == ["Astronomy"]
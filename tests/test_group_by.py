@@ -0,0 +1,17 @@
+from MLKit import data_table
+import pytest
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    monkeypatch.setenv("MLKIT_CACHE_DIR", "")
+    file_name = tmp_path / "groups.csv"
+    file_name.write_text("K,V\n1,2.5\n2,3.5\n1,4.0\n")
+    return data_table.DataTable(str(file_name))
+
+
+def test_numeric_groups_are_found_by_the_text_of_the_file(table):
+    assert "1" in table.group_by("K")
+    assert "1.0" in table.group_by("K")
+    assert "3" not in table.group_by("K")
+    assert table.values_for_target_column_named("K", ["1", "2"], ["V"]) == {"1": {"V": [2.5, 4.0]}, "2": {"V": [3.5]}}
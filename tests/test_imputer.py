@@ -0,0 +1,37 @@
+from MLKit import imputer
+import numpy as np
+
+
+def _rows(seed):
+    random = np.random.RandomState(seed)
+    X = random.normal(40, 500, (3, 500))
+    X[random.uniform(size=X.shape) < 0.1] = np.nan
+    labels = np.array(["Gryffindor", "Hufflepuff", "Ravenclaw", "Slytherin"])[random.randint(0, 4, 500)]
+    return X, labels
+
+
+def test_updated_fill_values_match_a_single_pass():
+    feature_names = ["Astronomy", "Herbology", "Ancient Runes"]
+    (first_X, first_labels) = _rows(0)
+    (second_X, second_labels) = _rows(1)
+
+    for strategy in ["mean", "class_mean"]:
+        single_pass = imputer.Imputer(strategy).fit(np.hstack([first_X, second_X]), feature_names,
+                                                    np.concatenate([first_labels, second_labels]))
+        first_imputer = imputer.Imputer(strategy).fit(first_X, feature_names, first_labels)
+        # The statistics of the first rows go through a saved model, as with an updated model.
+        updated = imputer.Imputer.from_dict(first_imputer.to_dict(), feature_names).partial_fit(second_X, second_labels)
+        from_arrays = imputer.Imputer.from_arrays(first_imputer.to_arrays(), feature_names)
+
+        np.testing.assert_allclose(updated.fill_values, single_pass.fill_values)
+        np.testing.assert_allclose(from_arrays.partial_fit(second_X, second_labels).fill_values, single_pass.fill_values)
+        np.testing.assert_allclose(updated.transform(second_X, second_labels),
+                                   single_pass.transform(second_X, second_labels))
+
+
+def test_saved_median_fill_values_cant_be_updated():
+    feature_names = ["Astronomy", "Herbology", "Ancient Runes"]
+    median_imputer = imputer.Imputer("median").fit(_rows(0)[0], feature_names)
+
+    assert median_imputer.can_partial_fit()
+    assert not imputer.Imputer.from_dict(median_imputer.to_dict(), feature_names).can_partial_fit()
@@ -0,0 +1,19 @@
+from MLKit import scaler
+import numpy as np
+
+
+def test_merged_statistics_match_a_single_pass():
+    random = np.random.RandomState(0)
+    X = random.normal(40, 500, (3, 1000))
+    X[random.uniform(size=X.shape) < 0.1] = np.nan
+    feature_names = ["Astronomy", "Herbology", "Ancient Runes"]
+
+    single_pass = scaler.StandardScaler().fit(X, feature_names)
+    first_half = scaler.StandardScaler().fit(X[:, :400], feature_names)
+    # The statistics of the first half go through a saved model, as with an updated model.
+    merged = scaler.StandardScaler.from_dict(first_half.to_dict(), feature_names).partial_fit(X[:, 400:])
+
+    np.testing.assert_allclose(merged.mean, single_pass.mean)
+    np.testing.assert_allclose(merged.std, single_pass.std)
+    np.testing.assert_array_equal(merged.count, single_pass.count)
+    np.testing.assert_array_equal(merged.value_count, (~np.isnan(X)).sum(axis=1))